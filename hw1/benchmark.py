@@ -0,0 +1,480 @@
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import click
+
+# folder with the scripts to benchmark
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# script running commands and reporting their time and peak memory
+LAUNCHER_PATH = os.path.join(SCRIPTS_DIR, "launcher.py")
+# sizes of synthetic corpora by their names
+SIZES = {
+    "1M": 2**20,
+    "10M": 10 * 2**20,
+    "100M": 100 * 2**20,
+    "1G": 2**30,
+    "10G": 10 * 2**30,
+}
+# size of the pool of random lines the corpora are assembled from
+POOL_SIZE = 4 * 2**20
+# words of the corpora: ASCII, Cyrillic, CJK and emoji
+WORDS = ["line", "tail", "wc", "строка", "слово", "файл", "行", "文字", "😀", "🚀"]
+# budget of cumulative import time of the modules of the utilities, ms
+IMPORT_TIME_BUDGET_MS = 20
+
+
+def generate_pool(seed=0):
+    """Generate pool of random lines of varied length.
+
+    Most lines are short, some are empty and some are very long.
+    Words are separated by spaces and tabs and contain multibyte
+    UTF-8 characters.
+
+    Parameters
+    ----------
+    seed : int, optional
+        The seed of the random generator.
+
+    Returns
+    -------
+    bytes
+        The pool of lines, each one ends with a line break.
+    """
+    rng = random.Random(seed)
+    lines, size = [], 0
+    while size < POOL_SIZE:
+        kind = rng.random()
+        if kind < 0.1:
+            words_cnt = 0
+        elif kind < 0.99:
+            words_cnt = rng.randint(1, 20)
+        else:
+            words_cnt = rng.randint(1000, 3000)
+
+        words = [rng.choice(WORDS) + str(rng.randint(0, 999)) for _ in range(words_cnt)]
+        line = "".join(word + rng.choice(" \t ") for word in words).encode() + b"\n"
+        lines.append(line)
+        size += len(line)
+
+    return b"".join(lines)
+
+
+def generate_corpus(file_path, size, seed=0):
+    """Generate text file of the given size from the pool of random lines.
+
+    The file is assembled from random slices of the pool, so it is
+    generated at disk speed. It does not end with a line break.
+    Existing file of the same size is reused.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    size : int
+        The size of the file in bytes.
+    seed : int, optional
+        The seed of the random generator.
+    """
+    if os.path.isfile(file_path) and os.path.getsize(file_path) == size:
+        return
+
+    rng = random.Random(seed)
+    pool = generate_pool(seed)
+    with open(file_path, "wb") as file:
+        written = 0
+        while written < size:
+            start = rng.randrange(len(pool) // 2)
+            part = pool[start : start + min(len(pool) // 2, size - written)]
+            # последняя строка файла без переноса строки
+            if written + len(part) == size and part.endswith(b"\n"):
+                part = part[:-1] + b"x"
+            file.write(part)
+            written += len(part)
+
+
+def get_modes(jobs):
+    """Get benchmarked modes of the utilities.
+
+    Parameters
+    ----------
+    jobs : int
+        The number of processes for parallel modes.
+
+    Returns
+    -------
+    list of dict
+        Modes with keys "utility", "mode", "command" and "stdin".
+        "command" is a list of arguments where "{file}" is replaced by
+        the path to the corpus, if "stdin" is True the corpus is given
+        to stdin.
+    """
+    python = [sys.executable]
+    nl = python + [os.path.join(SCRIPTS_DIR, "nl.py")]
+    tail = python + [os.path.join(SCRIPTS_DIR, "tail.py")]
+    wc = python + [os.path.join(SCRIPTS_DIR, "wc.py")]
+
+    modes = [
+        ("nl", "nl.py", nl + ["{file}"], False),
+        ("nl", f"nl.py -j {jobs}", nl + ["{file}", "-j", str(jobs)], False),
+        ("nl", "nl.py stdin", nl, True),
+        ("nl", "system nl", ["nl", "-b", "a", "{file}"], False),
+        ("tail", "tail.py", tail + ["-f", "{file}"], False),
+        ("tail", "tail.py -n 1000", tail + ["-f", "{file}", "-n", "1000"], False),
+        ("tail", "tail.py stdin", tail, True),
+        ("tail", "system tail", ["tail", "{file}"], False),
+        ("tail", "system tail stdin", ["tail"], True),
+        ("wc", "wc.py -k python", wc + ["-f", "{file}", "-k", "python"], False),
+        ("wc", "wc.py -k numpy", wc + ["-f", "{file}", "-k", "numpy"], False),
+        ("wc", "wc.py --no-mmap", wc + ["-f", "{file}", "--no-mmap"], False),
+        ("wc", f"wc.py -j {jobs}", wc + ["-f", "{file}", "-j", str(jobs)], False),
+        ("wc", "wc.py stdin", wc, True),
+        ("wc", "system wc", ["wc", "{file}"], False),
+    ]
+    return [
+        {"utility": utility, "mode": mode, "command": command, "stdin": stdin}
+        for utility, mode, command, stdin in modes
+    ]
+
+
+def run_command(command, stdin_path=None):
+    """Run command and measure its wall time and peak memory.
+
+    `ru_maxrss` of a child of this process includes the memory the child
+    inherits from the harness before `exec`, so the command is run by
+    `launcher.py` in a separate small process which reports the time,
+    the peak memory and the exit code of its only child. The peak memory
+    is bounded below by the resident set size of the launcher (several
+    megabytes).
+
+    Parameters
+    ----------
+    command : list of str
+        The command to run, its output is discarded.
+    stdin_path : str or None, optional
+        The path to the file given to stdin of the command.
+
+    Returns
+    -------
+    seconds : float
+        The wall time of the command.
+    max_rss_kb : int
+        The peak resident set size of the command in kilobytes.
+    returncode : int
+        The exit code of the command.
+    """
+    stdin = open(stdin_path, "rb") if stdin_path else subprocess.DEVNULL
+    read_fd, write_fd = os.pipe()
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "-S", "-I", LAUNCHER_PATH, str(write_fd)] + command,
+            stdin=stdin,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            pass_fds=[write_fd],
+        )
+        os.close(write_fd)
+        with os.fdopen(read_fd) as report_file:
+            report = report_file.read().split()
+        process.wait()
+    finally:
+        if stdin_path:
+            stdin.close()
+
+    if process.returncode or len(report) != 3:
+        raise RuntimeError(f"launcher failed on {' '.join(command)}")
+    return float(report[0]), int(report[1]), int(report[2])
+
+
+def benchmark(corpora, modes, repeat):
+    """Run every mode on every corpus and collect results.
+
+    Parameters
+    ----------
+    corpora : dict
+        Paths to corpora by their names.
+    modes : list of dict
+        Modes created by `get_modes`.
+    repeat : int
+        The number of runs of every mode, the best time is reported.
+
+    Yields
+    ------
+    dict
+        The result of the mode on the corpus.
+    """
+    for size_name, file_path in corpora.items():
+        size = os.path.getsize(file_path)
+        for mode in modes:
+            if shutil.which(mode["command"][0]) is None:
+                continue
+
+            command = [arg.replace("{file}", file_path) for arg in mode["command"]]
+            stdin_path = file_path if mode["stdin"] else None
+            runs = [run_command(command, stdin_path) for _ in range(repeat)]
+            seconds = min(run[0] for run in runs)
+
+            yield {
+                "utility": mode["utility"],
+                "mode": mode["mode"],
+                "corpus": size_name,
+                "size_bytes": size,
+                "seconds": seconds,
+                "throughput_mb_s": size / 2**20 / seconds,
+                "max_rss_kb": max(run[1] for run in runs),
+                "returncode": max(run[2] for run in runs),
+            }
+
+
+def measure_import_time(module, repeat):
+    """Measure cumulative import time of the module by `python -X importtime`.
+
+    The module is imported with its bytecode cached like installed scripts,
+    so compilation is not measured.
+
+    Parameters
+    ----------
+    module : str
+        The name of the module in `SCRIPTS_DIR`.
+    repeat : int
+        The number of runs, the best time is reported.
+
+    Returns
+    -------
+    float
+        The cumulative import time of the module and its dependencies, ms.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+
+    times = []
+    # первый запуск записывает байткод
+    for _ in range(repeat + 1):
+        process = subprocess.run(
+            command, cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True
+        )
+        for line in process.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                times.append(int(fields[1]) / 1000)
+    return min(times[1:])
+
+
+def benchmark_startup(repeat):
+    """Measure startup overhead of the utilities on tiny input.
+
+    Parameters
+    ----------
+    repeat : int
+        The number of runs of every command, the mean time is reported.
+
+    Yields
+    ------
+    dict
+        The result of the utility.
+    """
+    python = [sys.executable]
+    hw1 = python + [os.path.join(SCRIPTS_DIR, "hw1.py")]
+    nl = python + [os.path.join(SCRIPTS_DIR, "nl.py")]
+    tail = python + [os.path.join(SCRIPTS_DIR, "tail.py")]
+    wc = python + [os.path.join(SCRIPTS_DIR, "wc.py")]
+
+    with tempfile.NamedTemporaryFile("wb", suffix=".txt") as file:
+        file.write(b"one line\n")
+        file.flush()
+
+        commands = [
+            ("python", "python -c pass", python + ["-c", "pass"]),
+            ("nl", "nl.py", nl + [file.name]),
+            ("nl", "hw1.py nl", hw1 + ["nl", file.name]),
+            ("tail", "tail.py", tail + ["-f", file.name]),
+            ("tail", "hw1.py tail", hw1 + ["tail", "-f", file.name]),
+            ("wc", "wc.py", wc + ["-f", file.name]),
+            ("wc", "hw1.py wc", hw1 + ["wc", "-f", file.name]),
+        ]
+        for utility, mode, command in commands:
+            runs = [run_command(command) for _ in range(repeat)]
+            result = {
+                "utility": utility,
+                "mode": mode,
+                "seconds": sum(run[0] for run in runs) / repeat,
+                "max_rss_kb": max(run[1] for run in runs),
+                "returncode": max(run[2] for run in runs),
+            }
+            if utility != "python":
+                result["import_ms"] = measure_import_time(utility, repeat)
+                result["import_budget_ms"] = IMPORT_TIME_BUDGET_MS
+            yield result
+
+
+def parse_sizes(ctx, param, value):
+    """Split the comma separated names of sizes of corpora and check them.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        The context of the command.
+    param : click.Parameter
+        The option with the sizes.
+    value : str
+        The comma separated names of sizes from `SIZES`.
+
+    Returns
+    -------
+    list of str
+        The names of sizes.
+
+    Raises
+    ------
+    click.BadParameter
+        If some name is not in `SIZES`.
+    """
+    size_names = value.split(",")
+    unknown = [size_name for size_name in size_names if size_name not in SIZES]
+    if unknown:
+        raise click.BadParameter(
+            f"unknown sizes {', '.join(unknown)}, choose from {', '.join(SIZES)}."
+        )
+    return size_names
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    "-s",
+    default="1M,10M,100M",
+    show_default=True,
+    callback=parse_sizes,
+    help=f"Comma separated sizes of corpora from {', '.join(SIZES)}.",
+)
+@click.option(
+    "--corpus-dir",
+    "-d",
+    default="bench_corpora",
+    show_default=True,
+    help="Folder for generated corpora, existing corpora are reused.",
+)
+@click.option("--utility", "-u", multiple=True, help="Benchmark only these utilities.")
+@click.option(
+    "--jobs", "-j", default=os.cpu_count(), help="Processes for parallel modes."
+)
+@click.option(
+    "--repeat", "-r", default=3, show_default=True, help="Runs of every mode."
+)
+@click.option(
+    "--output", "-o", default=None, help="JSON file for results [default: stdout]."
+)
+@click.option(
+    "--startup",
+    is_flag=True,
+    help="Measure startup overhead and import time budget instead of throughput.",
+)
+def benchmark_func(sizes, corpus_dir, utility, jobs, repeat, output, startup):
+    """Benchmark nl.py, tail.py and wc.py against nl, tail and wc Linux utilities
+
+    Parameters
+    ----------
+    sizes : list of str
+        The names of sizes of corpora from `SIZES`.
+    corpus_dir : str
+        The folder for generated corpora.
+    utility : tuple of str
+        The utilities to benchmark, all of them if empty.
+    jobs : int
+        The number of processes for parallel modes.
+    repeat : int
+        The number of runs of every mode.
+    output : str or None
+        The path to JSON file for results, None means stdout.
+    startup : bool
+        Whether to measure startup overhead on tiny input instead of
+        throughput on corpora. The exit code is 1 if the import time of
+        some utility exceeds `IMPORT_TIME_BUDGET_MS`.
+    """
+    if startup:
+        results = []
+        for result in benchmark_startup(repeat):
+            print(
+                f"{result['mode']:<15} {result['seconds'] * 1000:8.1f} ms"
+                + (
+                    f" import {result['import_ms']:6.1f} ms"
+                    if "import_ms" in result
+                    else ""
+                ),
+                file=sys.stderr,
+            )
+            results.append(result)
+        write_report(results, output)
+
+        over_budget = [
+            result["mode"]
+            for result in results
+            if result.get("import_ms", 0) > IMPORT_TIME_BUDGET_MS
+        ]
+        if over_budget:
+            print(
+                f"import time budget is exceeded: {', '.join(over_budget)}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        return
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpora = {}
+    for size_name in sizes:
+        file_path = os.path.join(corpus_dir, f"corpus_{size_name}.txt")
+        print(f"generating {file_path}", file=sys.stderr)
+        generate_corpus(file_path, SIZES[size_name])
+        corpora[size_name] = file_path
+
+    modes = [
+        mode for mode in get_modes(jobs) if not utility or mode["utility"] in utility
+    ]
+
+    results = []
+    for result in benchmark(corpora, modes, repeat):
+        print(
+            f"{result['corpus']:>5} {result['mode']:<20} "
+            f"{result['seconds']:8.3f} s {result['throughput_mb_s']:9.1f} MB/s "
+            f"{result['max_rss_kb']:>8} KB",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    write_report(results, output)
+
+
+def write_report(results, output):
+    """Write results with the description of the platform as JSON.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of the benchmark.
+    output : str or None
+        The path to JSON file, None means stdout.
+    """
+    report = {
+        "date": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    benchmark_func()
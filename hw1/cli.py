@@ -0,0 +1,235 @@
+import errno
+import os
+import sys
+
+
+class UsageError(Exception):
+    """Error in the usage of the command, it is reported by click."""
+
+
+def convert_value(option, value):
+    """Convert the value of the option and check it like click does.
+
+    Parameters
+    ----------
+    option : dict
+        The description of the option, see `parse_argv`.
+    value : str
+        The value from the command line.
+
+    Returns
+    -------
+    object
+        The converted value.
+
+    Raises
+    ------
+    ValueError
+        If the value is invalid.
+    """
+    value = option.get("type", str)(value)
+    if "min" in option and value < option["min"]:
+        raise ValueError(value)
+    if "choices" in option and value not in option["choices"]:
+        raise ValueError(value)
+    if option.get("file") and os.path.isdir(value):
+        raise ValueError(value)
+    return value
+
+
+def parse_argv(argv, options, argument=None):
+    """Parse command line arguments without click.
+
+    Only the common forms are supported: `--name value`, `--name=value`,
+    `-n value`, `-nvalue`, flags and one positional argument.
+    Everything else like `--help`, unknown options or invalid values is
+    left to click, so its messages are the same.
+
+    Options are described by dicts with keys:
+    "decls" - the names of the option like `["--jobs", "-j"]` or
+    `["--mmap/--no-mmap"]` for boolean switches,
+    "dest" - the name of the parameter of the command function,
+    "type" - the function converting the value, str by default,
+    "default", "help", "show_default" - like in `click.option`,
+    "flag", "multiple" - like `is_flag` and `multiple` in `click.option`,
+    "min", "choices", "file" - restrictions like `click.IntRange`,
+    `click.Choice` and `click.Path(dir_okay=False)`.
+
+    Parameters
+    ----------
+    argv : list of str
+        The command line arguments without the name of the program.
+    options : list of dict
+        The options of the command.
+    argument : dict or None, optional
+        The positional argument with keys "dest" and "default".
+
+    Returns
+    -------
+    dict or None
+        The parameters of the command function by their names or None
+        if the arguments should be parsed by click.
+    """
+    params = {}
+    options_by_name = {}
+    for option in options:
+        params[option["dest"]] = [] if option.get("multiple") else option.get("default")
+        for decl in option["decls"]:
+            if "/" in decl:
+                on_name, off_name = decl.split("/")
+                options_by_name[on_name] = (option, True)
+                options_by_name[off_name] = (option, False)
+            else:
+                options_by_name[decl] = (option, None)
+
+    positional = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--":
+            positional.extend(args)
+            break
+        if not arg.startswith("-") or arg == "-":
+            positional.append(arg)
+            continue
+
+        if arg.startswith("--"):
+            name, sep, value = arg.partition("=")
+            value = value if sep else None
+        else:
+            name, value = arg[:2], arg[2:] or None
+        if name not in options_by_name:
+            return None
+
+        option, switch = options_by_name[name]
+        if switch is not None or option.get("flag"):
+            if value is not None:
+                return None
+            params[option["dest"]] = True if switch is None else switch
+            continue
+
+        if value is None:
+            value = next(args, None)
+            if value is None:
+                return None
+        try:
+            value = convert_value(option, value)
+        except ValueError:
+            return None
+
+        if option.get("multiple"):
+            params[option["dest"]].append(value)
+        else:
+            params[option["dest"]] = value
+
+    if argument is not None:
+        if len(positional) > 1:
+            return None
+        params[argument["dest"]] = positional[0] if positional else argument["default"]
+    elif positional:
+        return None
+
+    for option in options:
+        if option.get("multiple"):
+            params[option["dest"]] = tuple(params[option["dest"]])
+    return params
+
+
+def build_command(func, options, argument=None):
+    """Build click command calling the function.
+
+    Parameters
+    ----------
+    func : callable
+        The command function, its docstring is the help of the command.
+    options : list of dict
+        The options of the command, see `parse_argv`.
+    argument : dict or None, optional
+        The positional argument with keys "dest" and "default".
+
+    Returns
+    -------
+    click.Command
+        The command.
+    """
+    import click
+
+    params = []
+    if argument is not None:
+        params.append(click.Argument([argument["dest"]], default=argument["default"]))
+
+    for option in options:
+        kwargs = {
+            "default": option.get("default"),
+            "help": option.get("help"),
+            "show_default": option.get("show_default", False),
+        }
+        if "choices" in option:
+            kwargs["type"] = click.Choice(option["choices"])
+        elif "min" in option:
+            kwargs["type"] = click.IntRange(min=option["min"])
+        elif option.get("file"):
+            kwargs["type"] = click.Path(dir_okay=False)
+        elif "type" in option:
+            kwargs["type"] = option["type"]
+        if option.get("flag"):
+            kwargs["is_flag"] = True
+        if option.get("multiple"):
+            kwargs["multiple"] = True
+            del kwargs["default"]
+        params.append(click.Option([*option["decls"], option["dest"]], **kwargs))
+
+    def callback(**params):
+        try:
+            return func(**params)
+        except UsageError as error:
+            raise click.UsageError(str(error)) from error
+
+    return click.Command(
+        func.__name__, callback=callback, params=params, help=func.__doc__
+    )
+
+
+def run_command(func, options, argument=None, argv=None, prog_name=None):
+    """Run the command function with parameters from the command line.
+
+    The arguments are parsed by `parse_argv`, so click is not imported
+    for the common command lines and the startup is faster. Help, errors
+    and `UsageError` raised by the function are handled by the click command
+    built by `build_command`.
+
+    Parameters
+    ----------
+    func : callable
+        The command function.
+    options : list of dict
+        The options of the command, see `parse_argv`.
+    argument : dict or None, optional
+        The positional argument with keys "dest" and "default".
+    argv : list of str or None, optional
+        The command line arguments, None means `sys.argv[1:]`.
+    prog_name : str or None, optional
+        The name of the program in help and error messages.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    params = parse_argv(argv, options, argument)
+    if params is not None:
+        try:
+            func(**params)
+            return
+        except UsageError:
+            # сообщение об ошибке выводит click
+            pass
+        except KeyboardInterrupt:
+            print("\nAborted!", file=sys.stderr)
+            sys.exit(1)
+        except OSError as error:
+            # вывод закрыт, например, `| head`
+            if error.errno != errno.EPIPE:
+                raise
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+
+    command = build_command(func, options, argument)
+    command.main(args=argv, prog_name=prog_name)
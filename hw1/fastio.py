@@ -0,0 +1,160 @@
+import importlib
+import os
+import sys
+
+# default size of buffers used to read input and write output
+BUFFER_SIZE = 1024 * 1024
+# modules with streaming decoders of compressed files by their extensions
+DECOMPRESSORS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma"}
+# number of bytes before the end of the processed part of the file whose
+# digest is stored to check that the file was only appended
+TAIL_DIGEST_SIZE = 4096
+
+
+def is_compressed(file_path):
+    """Check if the file is compressed and is decompressed by `open_input`.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+
+    Returns
+    -------
+    bool
+        True if the extension of the file is one of `DECOMPRESSORS`.
+    """
+    return os.path.splitext(file_path)[1] in DECOMPRESSORS
+
+
+def get_tail_digest(file_path, size):
+    """Function to calc digest of the last bytes of the beginning of the file
+
+    It is used by `wc_cache` and `line_index` to check that the file was
+    only appended after it was processed.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    size : int
+        The size of the beginning of the file.
+
+    Returns
+    -------
+    bytes
+        BLAKE2 digest of `TAIL_DIGEST_SIZE` bytes before offset `size`.
+    """
+    # hashlib импортируется только когда нужен, он замедляет запуск утилит
+    import hashlib
+
+    start = max(0, size - TAIL_DIGEST_SIZE)
+    with open(file_path, "rb") as file:
+        data = os.pread(file.fileno(), size - start, start)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def open_input(file_path=None):
+    """Open the file or stdin for reading in binary mode.
+
+    Plain files and stdin are opened without buffering, so chunks are read
+    by `iter_chunks` directly into its buffer. Reading unbuffered stdin
+    returns the data available at the moment, so pipes are read by big
+    blocks and lines entered in terminal are available at once.
+    Files with extensions `.gz`, `.bz2` and `.xz` are decompressed
+    on the fly by streaming decoders.
+
+    Parameters
+    ----------
+    file_path : str or None, optional
+        The path to the file, None means stdin.
+
+    Returns
+    -------
+    file object
+        The file opened in binary mode, stdin is not closed with it.
+    """
+    if not file_path:
+        return open(sys.stdin.fileno(), "rb", buffering=0, closefd=False)
+
+    if is_compressed(file_path):
+        extension = os.path.splitext(file_path)[1]
+        # модули распаковки импортируются только когда нужны
+        decompressor = importlib.import_module(DECOMPRESSORS[extension])
+        return decompressor.open(file_path, "rb")
+
+    return open(file_path, "rb", buffering=0)
+
+
+def open_output(buffer_size=BUFFER_SIZE):
+    """Open stdout for writing in binary mode with big buffer.
+
+    Parameters
+    ----------
+    buffer_size : int, optional
+        The size of the buffer.
+
+    Returns
+    -------
+    file object
+        The buffered binary writer, stdout is not closed with it.
+    """
+    sys.stdout.flush()
+    return open(sys.stdout.fileno(), "wb", buffering=buffer_size, closefd=False)
+
+
+def iter_chunks(file, buffer_size=BUFFER_SIZE, limit=None):
+    """Read binary file by chunks into one preallocated buffer.
+
+    Chunks are read by `readinto`, so no new objects are allocated
+    for them. Chunks may be shorter than the buffer, e.g. for pipes.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode.
+    buffer_size : int, optional
+        The size of the buffer.
+    limit : int or None, optional
+        The maximum number of bytes to read, None means the end of file.
+
+    Yields
+    ------
+    chunk : memoryview
+        The next chunk of the file. It is a view of the buffer, so it is
+        valid only until the next chunk is requested.
+    """
+    view = memoryview(bytearray(buffer_size))
+    while limit is None or limit > 0:
+        size = buffer_size if limit is None else min(buffer_size, limit)
+        read_cnt = file.readinto(view[:size])
+        if not read_cnt:
+            break
+        if limit is not None:
+            limit -= read_cnt
+        yield view[:read_cnt]
+
+
+def iter_lines(chunks):
+    """Split chunks of binary text into lines.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes-like
+        The chunks of text.
+
+    Yields
+    ------
+    line : bytes
+        The next line with its line break, the last line may be without it.
+    """
+    # the beginning of the line that continues in the next chunk
+    line_start = b""
+    for chunk in chunks:
+        lines = (line_start + chunk).split(b"\n")
+        line_start = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+
+    if line_start:
+        yield line_start
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import importlib
+import os
+import sys
+
+# modules of the utilities by their names
+COMMANDS = {"nl": "nl", "tail": "tail", "wc": "wc"}
+
+
+def main(argv=None):
+    """Run the utility given by the name of the program or by the first argument
+
+    It is a multi-call program like busybox: `hw1.py wc -f file.txt` runs
+    `wc.py`, and so does a symlink `wc -> hw1.py`. Only the module of
+    the utility is imported.
+
+    Parameters
+    ----------
+    argv : list of str or None, optional
+        The command line arguments with the name of the program,
+        None means `sys.argv`.
+    """
+    argv = sys.argv if argv is None else argv
+    name = os.path.splitext(os.path.basename(argv[0]))[0]
+    args = argv[1:]
+
+    if name not in COMMANDS:
+        if not args or args[0] not in COMMANDS:
+            print(
+                f"Usage: {os.path.basename(argv[0])} {{{','.join(COMMANDS)}}} [ARGS]...",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+        name, args = args[0], args[1:]
+
+    module = importlib.import_module(COMMANDS[name])
+    module.main(args, prog_name=name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Run command and report its wall time and peak memory.
+
+Used by `benchmark.py` as an intermediate process:
+
+    python -S -I launcher.py FD COMMAND [ARGS]...
+
+The command is the only child of the launcher, so `ru_maxrss` of
+`os.wait4` belongs to it and not to the benchmark harness. The report
+"<seconds> <max_rss_kb> <returncode>" is written to the file descriptor FD.
+"""
+
+import os
+import sys
+import time
+
+# exit code of the command which can not be executed, as in shells
+NOT_FOUND_CODE = 127
+
+
+def launch(command):
+    """Run command and wait for it.
+
+    The child inherits stdin, stdout and stderr of the launcher.
+    The peak memory of the executed program is still bounded below by
+    the resident set size of the launcher itself (several megabytes),
+    because the kernel carries it over through `exec`.
+
+    Parameters
+    ----------
+    command : list of str
+        The command with its arguments.
+
+    Returns
+    -------
+    seconds : float
+        The wall time of the command.
+    max_rss_kb : int
+        The peak resident set size of the command in kilobytes.
+    returncode : int
+        The exit code of the command, negative signal number if it was
+        killed, `NOT_FOUND_CODE` if it can not be executed.
+    """
+    start_time = time.perf_counter()
+    try:
+        pid = os.posix_spawnp(command[0], command, os.environ)
+    except OSError:
+        return time.perf_counter() - start_time, 0, NOT_FOUND_CODE
+
+    _, status, rusage = os.wait4(pid, 0)
+    seconds = time.perf_counter() - start_time
+    return seconds, rusage.ru_maxrss, os.waitstatus_to_exitcode(status)
+
+
+def main():
+    """Parse arguments, run the command and write the report."""
+    report_fd, command = int(sys.argv[1]), sys.argv[2:]
+    # команда не должна унаследовать канал отчета
+    os.set_inheritable(report_fd, False)
+    seconds, max_rss_kb, returncode = launch(command)
+    with os.fdopen(report_fd, "w") as report_file:
+        report_file.write(f"{seconds} {max_rss_kb} {returncode}")
+
+
+if __name__ == "__main__":
+    main()
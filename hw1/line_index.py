@@ -0,0 +1,260 @@
+import os
+import re
+import struct
+from array import array
+from importlib.util import find_spec
+
+from fastio import BUFFER_SIZE, get_tail_digest
+
+# numpy is imported only when the index is built
+HAS_NUMPY = find_spec("numpy") is not None
+
+# every INDEX_STRIDE-th line has its offset stored in the index
+INDEX_STRIDE = 4096
+# extension of the sidecar file with the index
+INDEX_SUFFIX = ".lidx"
+# header of the sidecar file: magic, stride, indexed size, modification time
+# and inode of the file, number of line breaks in indexed part and digest
+# of its last bytes, see `fastio.get_tail_digest`
+INDEX_HEADER = struct.Struct("<4sQQQQQ16s")
+INDEX_MAGIC = b"LID2"
+
+
+def get_index_path(file_path):
+    """Get the path to the sidecar file with the line index of the file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the text file.
+
+    Returns
+    -------
+    str
+        The path to the sidecar file.
+    """
+    return file_path + INDEX_SUFFIX
+
+
+def find_newlines(block):
+    """Find offsets of all line breaks in block.
+
+    Parameters
+    ----------
+    block : bytes
+        The block of the text file.
+
+    Returns
+    -------
+    sequence of int
+        The offsets of line breaks in the block in ascending order.
+    """
+    if HAS_NUMPY:
+        import numpy as np
+
+        return np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+    return [match.start() for match in re.finditer(b"\n", block)]
+
+
+def load_index(file_path):
+    """Load the line index of the file from its sidecar file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the text file.
+
+    Returns
+    -------
+    index : dict or None
+        The index with keys "stride", "size", "mtime_ns", "ino", "lines_cnt",
+        "tail_digest" and "offsets" or None if there is no valid sidecar file.
+        "offsets" is `array('Q')` where k-th element is the offset of
+        the line number `k * stride + 1`.
+    """
+    try:
+        with open(get_index_path(file_path), "rb") as index_file:
+            header = index_file.read(INDEX_HEADER.size)
+            offsets = array("Q", index_file.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if len(header) != INDEX_HEADER.size:
+        return None
+    magic, stride, size, mtime_ns, ino, lines_cnt, tail_digest = INDEX_HEADER.unpack(
+        header
+    )
+    if magic != INDEX_MAGIC:
+        return None
+
+    return {
+        "stride": stride,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "ino": ino,
+        "lines_cnt": lines_cnt,
+        "tail_digest": tail_digest,
+        "offsets": offsets,
+    }
+
+
+def save_index(file_path, index):
+    """Save the line index of the file to its sidecar file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the text file.
+    index : dict
+        The index created by `update_index`.
+    """
+    header = INDEX_HEADER.pack(
+        INDEX_MAGIC,
+        index["stride"],
+        index["size"],
+        index["mtime_ns"],
+        index["ino"],
+        index["lines_cnt"],
+        index["tail_digest"],
+    )
+    with open(get_index_path(file_path), "wb") as index_file:
+        index_file.write(header)
+        index["offsets"].tofile(index_file)
+
+
+def update_index(file_path, stride=INDEX_STRIDE):
+    """Get the line index of the file, building or extending it if needed.
+
+    The index stored in the sidecar file is used as is if the size,
+    the modification time and the inode of the file did not change.
+    If the file grew and the digest of the last bytes of its indexed part
+    is the same, the file was only appended like logs, so only the appended
+    part is scanned. Otherwise the file was rewritten or replaced,
+    and the index is built from scratch.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the regular text file.
+    stride : int, optional
+        Every `stride`-th line has its offset stored in the index.
+
+    Returns
+    -------
+    index : dict
+        The index, see `load_index`.
+    """
+    file_stat = os.stat(file_path)
+    index = load_index(file_path)
+
+    if index is not None:
+        if index["stride"] != stride or index["ino"] != file_stat.st_ino:
+            index = None
+        elif (index["size"], index["mtime_ns"]) == (
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+        ):
+            return index
+        elif index["size"] >= file_stat.st_size:
+            index = None
+        elif index["tail_digest"] != get_tail_digest(file_path, index["size"]):
+            index = None
+
+    if index is None:
+        index = {
+            "stride": stride,
+            "size": 0,
+            "lines_cnt": 0,
+            "offsets": array("Q", [0]),
+        }
+
+    with open(file_path, "rb") as file:
+        file.seek(index["size"])
+        pos, lines_cnt = index["size"], index["lines_cnt"]
+        while block := file.read(min(BUFFER_SIZE, file_stat.st_size - pos)):
+            newlines = find_newlines(block)
+            # line with number lines_cnt + i + 2 starts after i-th line break,
+            # the offsets of lines with numbers k * stride + 1 are stored
+            first = (-lines_cnt - 1) % stride
+            index["offsets"].extend(pos + int(i) + 1 for i in newlines[first::stride])
+
+            pos += len(block)
+            lines_cnt += len(newlines)
+
+    index.update(
+        size=pos,
+        mtime_ns=file_stat.st_mtime_ns,
+        ino=file_stat.st_ino,
+        lines_cnt=lines_cnt,
+        tail_digest=get_tail_digest(file_path, pos),
+    )
+    save_index(file_path, index)
+    return index
+
+
+def skip_lines(file, offset, n):
+    """Find the offset of the line that is n lines after the given offset.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode.
+    offset : int
+        The offset of the beginning of some line.
+    n : int
+        The number of lines to skip.
+
+    Returns
+    -------
+    int
+        The offset of the beginning of the line, or the size of the file
+        if the file has less lines.
+    """
+    file.seek(offset)
+    while n > 0:
+        block = file.read(BUFFER_SIZE)
+        if not block:
+            break
+
+        newlines_cnt = block.count(b"\n")
+        if newlines_cnt < n:
+            n -= newlines_cnt
+            offset += len(block)
+            continue
+
+        idx = -1
+        for _ in range(n):
+            idx = block.find(b"\n", idx + 1)
+        return offset + idx + 1
+
+    return offset
+
+
+def find_line_offset(file, line_number, index=None):
+    """Find the offset of the beginning of the line of the file.
+
+    Without the index the file is scanned from its beginning, with the index
+    at most `stride` lines are scanned.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode.
+    line_number : int
+        The number of the line starting from 1.
+    index : dict or None, optional
+        The line index of the file created by `update_index`.
+
+    Returns
+    -------
+    int
+        The offset of the beginning of the line, or the size of the file
+        if the file has less lines.
+    """
+    offset, skip = 0, max(line_number - 1, 0)
+    if index is not None:
+        k = min(skip // index["stride"], len(index["offsets"]) - 1)
+        offset = index["offsets"][k]
+        skip -= k * index["stride"]
+
+    return skip_lines(file, offset, skip)
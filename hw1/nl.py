@@ -1,28 +1,332 @@
-import click
+import mmap
+import os
+from collections import deque
+from itertools import accumulate
 
+from cli import UsageError, run_command
+from fastio import is_compressed, iter_chunks, open_input, open_output
 
-@click.command()
-@click.argument("file_path", default="")
-def nl_func(file_path):
+# approximate size of the parts of file numbered by parallel processes
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def number_lines(lines, start):
+    """Format batch of lines with their numbers like `nl -b a`.
+
+    Parameters
+    ----------
+    lines : list of bytes
+        The lines without line breaks.
+    start : int
+        The number of the first line.
+
+    Returns
+    -------
+    bytes
+        The numbered lines, each one ends with a line break.
+    """
+    return b"".join([b"%6d  %s\n" % (i, line) for i, line in enumerate(lines, start)])
+
+
+def nl_stream(chunks, out, flush_blocks=False, first_number=1):
+    """Number lines of binary stream and write them to output.
+
+    The input is read by big blocks, lines of every block are numbered
+    in one batch and written to output by one call.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes-like
+        The blocks of input.
+    out : file object
+        The binary output.
+    flush_blocks : bool, optional
+        Whether to flush output after every block, e.g. for interactive input.
+    first_number : int, optional
+        The number of the first line.
+    """
+    number = first_number
+    # the beginning of the line that continues in the next block
+    line_start = b""
+
+    for block in chunks:
+        lines = (line_start + block).split(b"\n")
+        line_start = lines.pop()
+
+        out.write(number_lines(lines, number))
+        number += len(lines)
+        if flush_blocks:
+            out.flush()
+
+    if line_start:
+        out.write(number_lines([line_start], number))
+    out.flush()
+
+
+def split_by_lines(file_path, chunk_size=CHUNK_SIZE):
+    """Split file into ranges of bytes that consist of whole lines.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the non-empty regular file.
+    chunk_size : int, optional
+        The approximate size of the ranges.
+
+    Returns
+    -------
+    list of list of int
+        list of ranges [start, end), every range except the last one
+        ends with a line break.
+    """
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            size = len(mapped_file)
+            bounds = [0]
+            while bounds[-1] < size:
+                # граница сдвигается на начало следующей строки
+                line_end = mapped_file.find(b"\n", bounds[-1] + chunk_size - 1)
+                bounds.append(size if line_end == -1 else line_end + 1)
+
+    return [[bounds[i], bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def read_range(file_path, start, end):
+    """Read range of bytes from file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+
+    Returns
+    -------
+    bytes
+        The data of the range.
+    """
+    with open(file_path, "rb") as file:
+        return os.pread(file.fileno(), end - start, start)
+
+
+def count_range_lines(file_path, start, end):
+    """Count line breaks in range of bytes of file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+
+    Returns
+    -------
+    int
+        The number of line breaks in the range.
+    """
+    return read_range(file_path, start, end).count(b"\n")
+
+
+def number_range_lines(file_path, start, end, first_number):
+    """Format lines of range of bytes of file with their numbers.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file.
+    start : int
+        The offset of the beginning of the range, it must be
+        the beginning of a line.
+    end : int
+        The offset of the end of the range (not included), it must be
+        the end of a line or the end of the file.
+    first_number : int
+        The number of the first line of the range.
+
+    Returns
+    -------
+    bytes
+        The numbered lines of the range.
+    """
+    lines = read_range(file_path, start, end).split(b"\n")
+    if not lines[-1]:
+        lines.pop()
+    return number_lines(lines, first_number)
+
+
+def nl_file_parallel(file_path, out, jobs):
+    """Number lines of file by parallel processes and write them to output.
+
+    In the first pass processes count lines in parts of the file, prefix
+    sums of the counts give the number of the first line of every part.
+    In the second pass processes format the parts independently and
+    the results are written to output in the order of the parts. At most
+    `2 * jobs` formatted parts are kept in memory. The output is the same
+    as the output of `nl_stream`.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the regular file.
+    out : file object
+        The binary output.
+    jobs : int
+        The number of processes.
+    """
+    if os.path.getsize(file_path) == 0:
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = split_by_lines(file_path)
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        lines_cnts = executor.map(
+            count_range_lines, [file_path] * len(ranges), starts, ends
+        )
+        first_numbers = accumulate(lines_cnts, initial=1)
+
+        pending = deque()
+        for start, end, first_number in zip(starts, ends, first_numbers):
+            if len(pending) == 2 * jobs:
+                out.write(pending.popleft().result())
+            pending.append(
+                executor.submit(number_range_lines, file_path, start, end, first_number)
+            )
+
+        while pending:
+            out.write(pending.popleft().result())
+    out.flush()
+
+
+def nl_file_range(file_path, out, from_line, to_line=None, use_index=False):
+    """Number lines of the range of lines of file and write them to output.
+
+    The lines before the range are not numbered, the beginning and the end
+    of the range are found by counting line breaks by blocks or, with
+    the line index, by seeking to the nearest indexed line.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the regular file.
+    out : file object
+        The binary output.
+    from_line : int
+        The number of the first line of the range.
+    to_line : int or None, optional
+        The number of the last line of the range, None means the end of file.
+    use_index : bool, optional
+        Whether to use the line index stored in the sidecar file,
+        it is built or extended if needed.
+    """
+    from line_index import find_line_offset, update_index
+
+    # индекс строится по смещениям в файле, поэтому для сжатых файлов не подходит
+    index = None
+    if use_index and not is_compressed(file_path):
+        index = update_index(file_path)
+
+    with open_input(file_path) as file:
+        start = find_line_offset(file, from_line, index)
+        end = None
+        if to_line is not None:
+            end = find_line_offset(file, to_line + 1, index)
+        file.seek(start)
+
+        limit = None if end is None else end - start
+        nl_stream(iter_chunks(file, limit=limit), out, first_number=from_line)
+
+
+# arguments of the command line, see `cli.parse_argv`
+NL_ARGUMENT = {"dest": "file_path", "default": ""}
+NL_OPTIONS = [
+    {
+        "decls": ["--jobs", "-j"],
+        "dest": "jobs",
+        "type": int,
+        "min": 1,
+        "default": 1,
+        "help": "Number of processes numbering parts of the file.",
+    },
+    {
+        "decls": ["--from-line"],
+        "dest": "from_line",
+        "type": int,
+        "min": 1,
+        "default": None,
+        "help": "Number of the first line to output.",
+    },
+    {
+        "decls": ["--to-line"],
+        "dest": "to_line",
+        "type": int,
+        "min": 1,
+        "default": None,
+        "help": "Number of the last line to output.",
+    },
+    {
+        "decls": ["--index"],
+        "dest": "use_index",
+        "flag": True,
+        "help": "Use line index in sidecar file to find the lines.",
+    },
+]
+
+
+def nl_func(file_path, jobs, from_line, to_line, use_index):
     """Simple function that works like `nl -b a` Linux utility
 
     Parameters
     ----------
     file_path : str
         The path to the text file to process.
+    jobs : int
+        The number of processes numbering parts of the file.
+    from_line : int or None
+        The number of the first line to output.
+    to_line : int or None
+        The number of the last line to output.
+    use_index : bool
+        Whether to use line index in sidecar file to find the lines.
     """
-    if file_path:
-        with open(file_path, "r") as file:
-            for i, line in enumerate(file):
-                line = line.strip()
-                print(f"{i + 1:>6}  {line}")
+    out = open_output()
+
+    if from_line is not None or to_line is not None:
+        if not file_path:
+            raise UsageError("Range of lines can be output only from a file.")
+        nl_file_range(file_path, out, from_line or 1, to_line, use_index)
+    elif jobs > 1 and os.path.isfile(file_path) and not is_compressed(file_path):
+        nl_file_parallel(file_path, out, jobs)
+    elif file_path:
+        with open_input(file_path) as file:
+            nl_stream(iter_chunks(file), out)
     else:
-        i = 0
-        while True:
-            line = input().strip()
-            print(f"{i + 1:>6}  {line}")
-            i += 1
+        # stdin returns the data available at the moment,
+        # so the lines entered in terminal are numbered at once
+        with open_input() as file:
+            nl_stream(iter_chunks(file), out, flush_blocks=True)
+
+
+def main(argv=None, prog_name=None):
+    """Run `nl_func` with parameters from the command line
+
+    Parameters
+    ----------
+    argv : list of str or None, optional
+        The command line arguments, None means `sys.argv[1:]`.
+    prog_name : str or None, optional
+        The name of the program in help and error messages.
+    """
+    run_command(nl_func, NL_OPTIONS, NL_ARGUMENT, argv, prog_name)
 
 
 if __name__ == "__main__":
-    nl_func()
+    main()
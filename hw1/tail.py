@@ -1,5 +1,70 @@
+import os
 import sys
-import click
+import time
+from collections import deque
+from functools import partial
+
+from cli import UsageError, run_command
+from fastio import is_compressed, iter_chunks, iter_lines, open_input
+
+# size of the block that is read from the end of the file at each step
+BLOCK_SIZE = 64 * 1024
+# pause between polls of followed files when there is no new data, sec
+SLEEP_INTERVAL = 0.1
+# default number of lines to output for files and for stdin like in coreutils
+LINES_NUM = 10
+
+
+def find_last_n_lines_offset(file, n, block_size=BLOCK_SIZE):
+    """Find the offset of the beginning of the last n lines in binary file.
+
+    The file is scanned from its end by blocks of fixed size until n line
+    breaks are found, so the amount of read data depends only on n and
+    on the length of lines, not on the size of the file.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode that supports `seek`.
+    n : int
+        The number of lines from the end of the file.
+    block_size : int, optional
+        The size of the block read from the file at each step.
+
+    Returns
+    -------
+    offset : int
+        The offset in bytes of the first of the last n lines.
+    """
+    end = file.seek(0, os.SEEK_END)
+    if n <= 0 or end == 0:
+        return end
+
+    # line break at the end of the file finishes the last line
+    # and does not separate it from the next one
+    file.seek(end - 1)
+    if file.read(1) == b"\n":
+        end -= 1
+
+    newlines_cnt = 0
+    pos = end
+    while pos > 0:
+        start = max(0, pos - block_size)
+        file.seek(start)
+        block = file.read(pos - start)
+
+        block_newlines_cnt = block.count(b"\n")
+        if newlines_cnt + block_newlines_cnt >= n:
+            # ищем нужный перенос строки внутри блока
+            idx = len(block)
+            for _ in range(n - newlines_cnt):
+                idx = block.rfind(b"\n", 0, idx)
+            return start + idx + 1
+
+        newlines_cnt += block_newlines_cnt
+        pos = start
+
+    return 0
 
 
 def read_last_n_lines(file_path, n):
@@ -12,47 +77,405 @@ def read_last_n_lines(file_path, n):
     n : int
         the number of lines from the file that we want to output to the terminal
     """
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        last_n_lines = lines[-n:]
+    tail = get_last_n_lines(file_path, n)
+
+    # print() has its own buffer, so flush it before writing bytes
+    sys.stdout.flush()
+    sys.stdout.buffer.write(tail)
+    sys.stdout.buffer.flush()
+
+
+def get_last_n_lines(file_path, n):
+    """Read n last lines from text file.
+
+    Plain files are read from the end by blocks. Compressed files and
+    files that do not support `seek` (pipes, FIFOs, `/dev/stdin`) can not
+    be read from the end, so they are read as a stream and only the last
+    n lines are kept in a ring buffer.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file we want to process.
+    n : int
+        the number of lines from the end of the file
+
+    Returns
+    -------
+    bytes
+        The last n lines of the file.
+    """
+    with open_input(file_path) as file:
+        if is_compressed(file_path) or not file.seekable():
+            return b"".join(read_last_n_lines_of_stream(file, n))
+
+        file.seek(find_last_n_lines_offset(file, n))
+        return file.read()
+
+
+def read_last_n_lines_of_stream(file, n):
+    """Read n last lines of binary stream that can not be read from the end.
+
+    The whole stream is read, but only the last n lines are kept
+    in a ring buffer, so memory does not depend on the size of the stream.
+
+    Parameters
+    ----------
+    file : file object
+        The stream opened in binary mode, e.g. stdin, pipe or
+        decompressed file.
+    n : int
+        the number of lines from the end of the stream
+
+    Returns
+    -------
+    collections.deque of bytes
+        The last n lines of the stream.
+    """
+    return deque(iter_lines(iter_chunks(file)), maxlen=max(n, 0))
+
+
+def read_last_n_lines_from_files(file_paths, n, jobs=1):
+    """Read n last lines from several text files and print them to terminal.
+
+    The last lines of the files are read concurrently by a pool of `jobs`
+    threads, so the latency of opening and reading the files (e.g. on network
+    filesystems) overlaps. The lines are printed in the order of `file_paths`,
+    each block is preceded by the header with the name of its file.
+
+    Parameters
+    ----------
+    file_paths : list of str
+        The paths to the files we want to process.
+    n : int
+        the number of lines from every file that we want to output to the terminal
+    jobs : int, optional
+        The number of threads reading the files.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # map returns results in the order of file_paths
+        tails = executor.map(partial(get_last_n_lines, n=n), file_paths)
+
+        for file, tail in zip(file_paths, tails):
+            print(f"==> {file} <==")
+            sys.stdout.flush()
+            sys.stdout.buffer.write(tail)
+            print()
+
+
+def print_last_n_lines(file, n):
+    """Print n last lines of opened binary file to terminal.
+
+    After the call the position of the file is at its end.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode. Files that do not support `seek`
+        are read to their end as a stream.
+    n : int
+        the number of lines from the file that we want to output to the terminal
+    """
+    if not file.seekable():
+        sys.stdout.flush()
+        sys.stdout.buffer.writelines(read_last_n_lines_of_stream(file, n))
+        sys.stdout.buffer.flush()
+        return
 
-        for line in last_n_lines:
-            print(line, end="")
+    print_from_offset(file, find_last_n_lines_offset(file, n))
+
+
+def print_from_offset(file, offset):
+    """Print data of opened binary file from the offset to its end to terminal.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode that supports `seek`.
+    offset : int
+        The offset of the data to print.
+    """
+    file.seek(offset)
+
+    # print() has its own buffer, so flush it before writing bytes
+    sys.stdout.flush()
+    for chunk in iter_chunks(file):
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.flush()
+
+
+def read_lines_from(file_path, from_line, use_index=False):
+    """Read lines of text file starting from the given one and print them to terminal.
+
+    It works like `tail -n +K`. The beginning of the line is found by counting
+    line breaks by blocks or, with the line index, by seeking to the nearest
+    indexed line.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file we want to process.
+    from_line : int
+        The number of the first line to output.
+    use_index : bool, optional
+        Whether to use the line index stored in the sidecar file,
+        it is built or extended if needed.
+    """
+    from line_index import find_line_offset, update_index
+
+    # индекс строится по смещениям в файле, поэтому для сжатых файлов не подходит
+    index = None
+    if use_index and not is_compressed(file_path):
+        index = update_index(file_path)
+
+    with open_input(file_path) as file:
+        print_from_offset(file, find_line_offset(file, from_line, index))
+
+
+def open_followed_file(file_path):
+    """Open file for following and remember its identity.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file we want to follow.
+
+    Returns
+    -------
+    followed : dict
+        The state of the followed file: its path, file object opened
+        in binary mode and the device and inode numbers of the file.
+    """
+    file = open(file_path, "rb")
+    stat = os.fstat(file.fileno())
+    return {"path": file_path, "file": file, "dev": stat.st_dev, "ino": stat.st_ino}
+
+
+def check_followed_file(followed):
+    """Detect truncation and rotation of the followed file.
+
+    If the file was truncated, reading continues from its beginning.
+    If the path now points to another file (the log was rotated),
+    the new file is opened instead of the old one. The old file must be
+    read to its end before the call, otherwise its last data is lost.
+
+    Parameters
+    ----------
+    followed : dict
+        The state of the followed file created by `open_followed_file`.
+
+    Returns
+    -------
+    bool
+        True if the file was replaced or truncated.
+    """
+    path = followed["path"]
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # файл удален при ротации, а новый еще не создан
+        return False
+
+    if (stat.st_dev, stat.st_ino) != (followed["dev"], followed["ino"]):
+        print(f"tail: '{path}' has been replaced; following new file", file=sys.stderr)
+        followed["file"].close()
+        followed.update(open_followed_file(path))
+        return True
+
+    # у каналов нет позиции, и их нельзя обрезать
+    if followed["file"].seekable() and stat.st_size < followed["file"].tell():
+        print(f"tail: {path}: file truncated", file=sys.stderr)
+        followed["file"].seek(0)
+        return True
+
+    return False
+
+
+def follow_files(file_paths, n, sleep_interval=SLEEP_INTERVAL):
+    """Print last n lines of files and then output data appended to them.
+
+    All files are watched in one loop: every file is polled for new data
+    and, when none of them has grown, the loop sleeps `sleep_interval`
+    seconds. So following hundreds of files does not need a thread per file.
+    Truncation of files and their rotation (replacement of the file
+    by a new one with other inode) are detected. The loop is stopped
+    by `Ctrl + C`.
+
+    Parameters
+    ----------
+    file_paths : list of str
+        The paths to the files we want to follow.
+    n : int
+        the number of lines from every file that we output before following
+    sleep_interval : float, optional
+        The pause between polls when there is no new data in files, sec.
+    """
+    followed_files = [open_followed_file(path) for path in file_paths]
+    show_headers = len(followed_files) > 1
+    out = sys.stdout.buffer
+
+    for followed in followed_files:
+        if show_headers:
+            print(f"==> {followed['path']} <==")
+        print_last_n_lines(followed["file"], n)
+        if show_headers:
+            print()
+    sys.stdout.flush()
+
+    # the output of the last lines already ends with an empty line
+    last_path, separator = followed_files[-1]["path"], ""
+    try:
+        while True:
+            has_new_data = False
+            for followed in followed_files:
+                data = followed["file"].read(BLOCK_SIZE)
+                if not data and check_followed_file(followed):
+                    data = followed["file"].read(BLOCK_SIZE)
+                if not data:
+                    continue
+
+                if show_headers and followed["path"] != last_path:
+                    out.write(f"{separator}==> {followed['path']} <==\n".encode())
+                    last_path = followed["path"]
+                out.write(data)
+                separator = "\n"
+                has_new_data = True
+
+            if has_new_data:
+                out.flush()
+            else:
+                time.sleep(sleep_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for followed in followed_files:
+            followed["file"].close()
 
 
 def read_last_n_lines_from_stdin(n):
-    """Read n lines from stdin and print them to terminal.
+    """Read n last lines from stdin and print them to terminal.
+
+    The whole stdin is read, but only the last n lines are kept
+    in a ring buffer, so memory does not depend on the size of input.
 
     Parameters
     ----------
     n : int
         the number of lines from the stdin that we want to output to the terminal
     """
-    for i in range(n):
-        print(sys.stdin.readline())
+    with open_input() as file:
+        last_lines = read_last_n_lines_of_stream(file, n)
+
+    sys.stdout.flush()
+    sys.stdout.buffer.writelines(last_lines)
+    sys.stdout.buffer.flush()
+
 
+# options of the command line, see `cli.parse_argv`
+TAIL_OPTIONS = [
+    {"decls": ["--file_path", "-f"], "dest": "file_path", "multiple": True},
+    {
+        "decls": ["--lines", "-n"],
+        "dest": "lines",
+        "type": int,
+        "min": 0,
+        "default": LINES_NUM,
+        "show_default": True,
+        "help": "Number of last lines to output.",
+    },
+    {
+        "decls": ["--jobs", "-j"],
+        "dest": "jobs",
+        "type": int,
+        "min": 1,
+        "default": 1,
+        "help": "Number of threads reading several files concurrently.",
+    },
+    {
+        "decls": ["--from-line"],
+        "dest": "from_line",
+        "type": int,
+        "min": 1,
+        "default": None,
+        "help": "Output lines starting from this one instead of last lines.",
+    },
+    {
+        "decls": ["--index"],
+        "dest": "use_index",
+        "flag": True,
+        "help": "Use line index in sidecar file to find the line given by --from-line.",
+    },
+    {
+        "decls": ["--follow"],
+        "dest": "follow",
+        "flag": True,
+        "help": "Output appended data as the files grow.",
+    },
+    {
+        "decls": ["--sleep-interval", "-s"],
+        "dest": "sleep_interval",
+        "type": float,
+        "default": SLEEP_INTERVAL,
+        "help": "Pause between polls of followed files, sec.",
+    },
+]
 
-@click.command()
-@click.option("--file_path", "-f", multiple=True)
-def tail_func(file_path):
+
+def tail_func(file_path, lines, jobs, from_line, use_index, follow, sleep_interval):
     """Simple function that works like `tail` Linux utility
 
     Parameters
     ----------
     file_path : str
         The path to the text file to process.
+    lines : int
+        The number of last lines to output.
+    jobs : int
+        The number of threads reading several files concurrently.
+    from_line : int or None
+        The number of the first line to output instead of last lines.
+    use_index : bool
+        Whether to use line index in sidecar file to find `from_line`.
+    follow : bool
+        Whether to output data appended to the files after their last lines.
+    sleep_interval : float
+        The pause between polls of followed files, sec.
     """
+    if from_line is not None and (not file_path or follow):
+        raise UsageError("--from-line can be used only with files without --follow.")
+
     if file_path:
-        if len(file_path) == 1:
-            read_last_n_lines(file_path[0], n=10)
-        else:
+        if from_line is not None:
             for file in file_path:
-                print(f"==> {file} <==")
-                read_last_n_lines(file, n=10)
-                print()
+                if len(file_path) > 1:
+                    print(f"==> {file} <==")
+                read_lines_from(file, from_line, use_index)
+                if len(file_path) > 1:
+                    print()
+        elif follow:
+            follow_files(file_path, n=lines, sleep_interval=sleep_interval)
+        elif len(file_path) == 1:
+            read_last_n_lines(file_path[0], n=lines)
+        else:
+            read_last_n_lines_from_files(file_path, n=lines, jobs=jobs)
     else:
-        read_last_n_lines_from_stdin(n=17)
+        read_last_n_lines_from_stdin(n=lines)
+
+
+def main(argv=None, prog_name=None):
+    """Run `tail_func` with parameters from the command line
+
+    Parameters
+    ----------
+    argv : list of str or None, optional
+        The command line arguments, None means `sys.argv[1:]`.
+    prog_name : str or None, optional
+        The name of the program in help and error messages.
+    """
+    run_command(tail_func, TAIL_OPTIONS, argv=argv, prog_name=prog_name)
 
 
 if __name__ == "__main__":
-    tail_func()
+    main()
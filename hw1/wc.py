@@ -1,16 +1,128 @@
-import click
-import sys
+import mmap
+import os
+import stat
+from collections import deque
+from contextlib import nullcontext
+from importlib.util import find_spec
 
+from cli import run_command
+from fastio import BUFFER_SIZE, is_compressed, iter_chunks, open_input
 
-def wc_calc(text):
+# numpy is imported only when it is needed, it takes most of the startup time
+HAS_NUMPY = find_spec("numpy") is not None
+# inputs up to this size are counted by the python kernel without importing numpy
+SMALL_INPUT_SIZE = 1024 * 1024
+# minimal width of columns if the size of some input is unknown like in wc
+MIN_COLUMN_WIDTH = 7
+
+
+def wc_calc_chunk(chunk, in_word):
+    """Function to calc statistics for one chunk of binary text.
+
+    Words are sequences of bytes separated by ASCII whitespace like
+    in wc Linux utility. Bytes of multibyte UTF-8 characters are never
+    whitespace, so characters split between chunks do not split words.
+
+    Parameters
+    ----------
+    chunk : bytes or memoryview
+        chunk of text from text file or stdin to process.
+    in_word : bool
+        whether the previous chunk ends inside a word. In this case the word
+        at the beginning of the chunk continues it and is not counted.
+
+    Returns
+    -------
+    lines_cnt: int
+        numbers of line breaks in chunk
+    words_cnt: int
+        numbers of words starting in chunk
+    in_word: bool
+        whether the chunk ends inside a word
+    """
+    chunk = bytes(chunk)
+    lines_cnt = chunk.count(b"\n")
+    words_cnt = len(chunk.split())
+
+    if words_cnt and in_word and not chunk[:1].isspace():
+        words_cnt -= 1
+
+    return lines_cnt, words_cnt, not chunk[-1:].isspace()
+
+
+def wc_calc_chunk_numpy(chunk, in_word):
+    """Function to calc statistics for one chunk of binary text by NumPy.
+
+    It is a vectorized variant of `wc_calc_chunk` with the same results.
+    The chunk is viewed as array of bytes without copying, and words are
+    counted as transitions from whitespace to non-whitespace bytes.
+
+    Parameters
+    ----------
+    chunk : bytes or memoryview
+        chunk of text from text file or stdin to process.
+    in_word : bool
+        whether the previous chunk ends inside a word.
+
+    Returns
+    -------
+    lines_cnt: int
+        numbers of line breaks in chunk
+    words_cnt: int
+        numbers of words starting in chunk
+    in_word: bool
+        whether the chunk ends inside a word
+    """
+    import numpy as np
+
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    if not data.size:
+        return 0, 0, in_word
+
+    if isinstance(chunk, bytes):
+        lines_cnt = chunk.count(b"\n")
+    else:
+        # memoryview of mapped file has no count(), but copying it is worse
+        lines_cnt = int(np.count_nonzero(data == 10))
+
+    # ASCII whitespace: space, \t, \n, \v, \f, \r
+    is_space = (data == 32) | ((data >= 9) & (data <= 13))
+    words_cnt = int(np.count_nonzero(is_space[:-1] & ~is_space[1:]))
+    if not in_word and not is_space[0]:
+        words_cnt += 1
+
+    return lines_cnt, words_cnt, not is_space[-1]
+
+
+# functions counting statistics for one chunk available by name
+KERNELS = {"python": wc_calc_chunk}
+if HAS_NUMPY:
+    KERNELS["numpy"] = wc_calc_chunk_numpy
+# kernel used when it is not chosen explicitly
+DEFAULT_KERNEL = "numpy" if HAS_NUMPY else "python"
+
+
+def wc_calc(chunks, kernel="python", in_word=False):
     """Function to calc statistics for text files like wc Linux utility.
     It calcs and returns for some input text file numbers of lines,
-    numbers of words and numbers of bytes or symbols.
+    numbers of words and numbers of bytes.
+
+    The text is processed by chunks, so only one chunk is kept in memory.
+    If the kernel is not chosen explicitly, the first `SMALL_INPUT_SIZE`
+    bytes are counted by the python kernel and the rest by `DEFAULT_KERNEL`,
+    so small inputs are counted without the startup cost of other kernels.
 
     Parameters
     ----------
-    text : str
-        text from text file or stdin to process.
+    chunks : iterable of bytes
+        chunks of text from text file or stdin to process.
+    kernel : str or None, optional
+        name of the function from `KERNELS` that counts statistics for
+        one chunk. "python" is the reference implementation, "numpy" is
+        the vectorized one. None means `DEFAULT_KERNEL` for big inputs.
+    in_word : bool, optional
+        whether the text is a part of bigger text that ends inside a word
+        just before it.
 
     Returns
     -------
@@ -18,36 +130,331 @@ def wc_calc(text):
         numbers of lines in text file
     words_cnt: int
         words of lines in text file
-    symbols_cnt: int
-        symbols of lines in text file
+    bytes_cnt: int
+        bytes of lines in text file
+    """
+    lines_cnt, words_cnt, bytes_cnt = 0, 0, 0
+    # явно выбранное ядро считает весь текст
+    small_input_size = SMALL_INPUT_SIZE if kernel is None else 0
+    calc_chunk = KERNELS[kernel or DEFAULT_KERNEL]
+
+    for chunk in chunks:
+        if bytes_cnt + len(chunk) <= small_input_size:
+            chunk_lines_cnt, chunk_words_cnt, in_word = wc_calc_chunk(chunk, in_word)
+        else:
+            chunk_lines_cnt, chunk_words_cnt, in_word = calc_chunk(chunk, in_word)
+        lines_cnt += chunk_lines_cnt
+        words_cnt += chunk_words_cnt
+        bytes_cnt += len(chunk)
+
+    return lines_cnt, words_cnt, bytes_cnt
+
+
+def read_pread_chunks(file, start, end, buffer_size=BUFFER_SIZE):
+    """Function to read byte range of binary file by chunks of fixed size
+
+    The chunks are read by `os.preadv` into one preallocated buffer, so
+    the position of the file is not used and several ranges of one file
+    can be read independently.
+
+    Parameters
+    ----------
+    file : file object
+        The regular file opened in binary mode.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+    buffer_size : int, optional
+        The size of chunks.
+
+    Yields
+    ------
+    chunk : memoryview
+        The next chunk of the range, the last one may be shorter. It is
+        a view of the buffer, so it is valid only until the next chunk
+        is requested.
+    """
+    view = memoryview(bytearray(buffer_size))
+    while start < end:
+        read_cnt = os.preadv(file.fileno(), [view[: end - start]], start)
+        if not read_cnt:
+            break
+        start += read_cnt
+        yield view[:read_cnt]
+
+
+def read_mmap_chunks(file, start, end, buffer_size=BUFFER_SIZE):
+    """Function to read byte range of regular binary file by chunks mapped to memory
+
+    The file is mapped to memory and chunks are views of the mapped pages,
+    so they are read without read syscalls and copying to buffers.
+    The kernel is advised that the pages are accessed sequentially.
+
+    Parameters
+    ----------
+    file : file object
+        The regular non-empty file opened in binary mode.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+    buffer_size : int, optional
+        The size of chunks.
+
+    Yields
+    ------
+    chunk : memoryview
+        The next chunk of the range. It is valid only until the next chunk
+        is requested.
+    """
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if hasattr(mapped_file, "madvise"):
+            mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+
+        with memoryview(mapped_file) as view:
+            end = min(end, len(view))
+            for chunk_start in range(start, end, buffer_size):
+                chunk_end = min(chunk_start + buffer_size, end)
+                with view[chunk_start:chunk_end] as chunk:
+                    yield chunk
+
+
+def split_range(start, end, n):
+    """Function to split byte range [start, end) into n nearly equal ranges
+
+    Parameters
+    ----------
+    start : int
+        The beginning of the range.
+    end : int
+        The end of the range (not included).
+    n : int
+        The number of ranges.
+
+    Returns
+    -------
+    list of list of int
+        list of ranges [start, end).
+
+    Examples
+    --------
+    >>> split_range(0, 10, 3)
+    [[0, 3], [3, 6], [6, 10]]
     """
-    lines_cnt, words_cnt, symbols_cnt = 0, 0, 0
+    bounds = [start + (end - start) * i // n for i in range(n + 1)]
+    return [[bounds[i], bounds[i + 1]] for i in range(n)]
 
-    for line in text:
-        lines_cnt += 1
-        words_cnt += len(line.split())
-        symbols_cnt += len(line)
 
-    return lines_cnt, words_cnt, symbols_cnt
+def wc_range(file_path, start, end, kernel="python", use_mmap=True):
+    """Function to calc statistics for byte range of regular text file
 
+    The byte before the range is checked to know if the range starts
+    inside a word, so the statistics of adjacent ranges can be just summed.
 
-def read_text_file(file_path):
-    """Function to read all lines from txt file
+    Parameters
+    ----------
+    file_path : str
+        The path to the regular text file to process.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+    kernel : str or None, optional
+        name of the function from `KERNELS` that counts statistics for chunks,
+        None means the default kernel, see `wc_calc`.
+    use_mmap : bool, optional
+        whether to map the file to memory instead of reading it.
+
+    Returns
+    -------
+    tuple of int
+        numbers of lines, words and bytes in the range
+    """
+    with open(file_path, "rb") as file:
+        in_word = start > 0 and not os.pread(file.fileno(), 1, start - 1).isspace()
+
+        if start >= end:
+            return 0, 0, 0
+        if use_mmap:
+            chunks = read_mmap_chunks(file, start, end)
+        else:
+            chunks = read_pread_chunks(file, start, end)
+
+        return wc_calc(chunks, kernel, in_word)
+
+
+def wc_regular_file(file_path, start, end, kernel="python", use_mmap=True, jobs=1):
+    """Function to calc statistics for byte range of regular text file
+
+    The range can be split into `jobs` smaller ranges that are counted
+    in parallel processes.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the regular text file to process.
+    start : int
+        The offset of the beginning of the range.
+    end : int
+        The offset of the end of the range (not included).
+    kernel : str or None, optional
+        name of the function from `KERNELS` that counts statistics for chunks,
+        None means the default kernel, see `wc_calc`.
+    use_mmap : bool, optional
+        whether to map the file to memory instead of reading it.
+    jobs : int, optional
+        the number of processes counting the range.
+
+    Returns
+    -------
+    tuple of int
+        numbers of lines, words and bytes in the range
+    """
+    # each process gets at least one buffer of data
+    jobs = max(1, min(jobs, (end - start) // BUFFER_SIZE))
+    if jobs == 1:
+        return wc_range(file_path, start, end, kernel, use_mmap)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = split_range(start, end, jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            wc_range,
+            [file_path] * jobs,
+            [range_start for range_start, _ in ranges],
+            [range_end for _, range_end in ranges],
+            [kernel] * jobs,
+            [use_mmap] * jobs,
+        )
+        return tuple(sum(counts) for counts in zip(*results))
+
+
+def wc_file(file_path, kernel="python", use_mmap=True, jobs=1, cache=None):
+    """Function to calc statistics for text file like wc Linux utility
+
+    Regular files can be split into `jobs` byte ranges that are counted
+    in parallel processes. Pipes, special files and compressed files
+    are read sequentially.
+
+    If the cache is given, statistics of unchanged regular files are taken
+    from it without reading the files, and for files that only grew
+    only the appended part is counted.
 
     Parameters
     ----------
     file_path : str
         The path to the text file to process.
+    kernel : str or None, optional
+        name of the function from `KERNELS` that counts statistics for chunks,
+        None means the default kernel, see `wc_calc`.
+    use_mmap : bool, optional
+        whether to map regular files to memory instead of reading them.
+    jobs : int, optional
+        the number of processes counting one regular file.
+    cache : WcCache or None, optional
+        the cache of statistics of files.
 
     Returns
     -------
-    lines : list
-        list of lines from text file.
+    tuple of int
+        numbers of lines, words and bytes in text file
     """
-    with open(file_path, "r") as file:
-        lines = file.readlines()
+    file_stat = os.stat(file_path)
+    if not stat.S_ISREG(file_stat.st_mode) or is_compressed(file_path):
+        with open_input(file_path) as file:
+            return wc_calc(iter_chunks(file), kernel)
+
+    size = file_stat.st_size
+    if cache is None:
+        return wc_regular_file(file_path, 0, size, kernel, use_mmap, jobs)
+
+    counts, start = cache.get(file_path, file_stat)
+    if start < size:
+        appended_counts = wc_regular_file(
+            file_path, start, size, kernel, use_mmap, jobs
+        )
+        counts = tuple(sum(i) for i in zip(counts, appended_counts))
+        cache.put(file_path, file_stat, counts)
+
+    return counts
 
-    return lines
+
+def wc_files(file_paths, kernel="python", use_mmap=True, jobs=1, cache=None):
+    """Function to calc statistics for several text files concurrently
+
+    Files are counted by a pool of `jobs` threads. Results are yielded in
+    the order of `file_paths` as soon as they are ready, at most `2 * jobs`
+    files are counted or wait for output at the same time.
+
+    Parameters
+    ----------
+    file_paths : list of str
+        The paths to the text files to process.
+    kernel : str or None, optional
+        name of the function from `KERNELS` that counts statistics for chunks,
+        None means the default kernel, see `wc_calc`.
+    use_mmap : bool, optional
+        whether to map regular files to memory instead of reading them.
+    jobs : int, optional
+        the number of threads counting files.
+    cache : WcCache or None, optional
+        the cache of statistics of files.
+
+    Yields
+    ------
+    counts : tuple of int
+        numbers of lines, words and bytes in the next text file
+    file_path : str
+        The path to the next text file.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for file_path in file_paths:
+            if len(pending) == 2 * jobs:
+                future, done_file_path = pending.popleft()
+                yield future.result(), done_file_path
+            future = executor.submit(wc_file, file_path, kernel, use_mmap, cache=cache)
+            pending.append((future, file_path))
+
+        while pending:
+            future, file_path = pending.popleft()
+            yield future.result(), file_path
+
+
+def get_column_width(file_paths):
+    """Function to get width of columns of wc output before counting
+
+    The number of bytes is never less than the numbers of lines and words,
+    so the width is given by the total size of the files. If size of some
+    input is unknown (pipes, special files, compressed files), the width is at least
+    `MIN_COLUMN_WIDTH` like in wc Linux utility.
+
+    Parameters
+    ----------
+    file_paths : list of str
+        The paths to the text files to process.
+
+    Returns
+    -------
+    n : int
+        the number of characters occupied by the largest number in the wc statistics.
+    """
+    total_size, has_unknown_size = 0, False
+    for file_path in file_paths:
+        file_stat = os.stat(file_path)
+        if stat.S_ISREG(file_stat.st_mode) and not is_compressed(file_path):
+            total_size += file_stat.st_size
+        else:
+            has_unknown_size = True
+
+    n = len(str(total_size))
+    if has_unknown_size:
+        n = max(n, MIN_COLUMN_WIDTH)
+    return n
 
 
 def wc_print(wc_data, n):
@@ -56,8 +463,8 @@ def wc_print(wc_data, n):
 
     Parameters
     ----------
-    wc_data : list
-        wc_data presented in form of list of list like
+    wc_data : iterable
+        wc_data presented in form of list (or other iterable) of list like
         [[line_cnt_str_1, word_cnt_str_1, symbols_cnt_str_1, text_file_path_1],
         ...
         [line_cnt_str_n, word_cnt_str_n, symbols_cnt_str_n, text_file_path_n],
@@ -77,55 +484,114 @@ def wc_print(wc_data, n):
         print(line)
 
 
-@click.command()
-@click.option("--file_path", "-f", multiple=True)
-def wc_func(file_path):
-    """Simple function that works like `nl -b a` Linux utility
+# options of the command line, see `cli.parse_argv`
+WC_OPTIONS = [
+    {"decls": ["--file_path", "-f"], "dest": "file_path", "multiple": True},
+    {
+        "decls": ["--kernel", "-k"],
+        "dest": "kernel",
+        "choices": list(KERNELS),
+        "default": None,
+        "help": (
+            "Implementation of counting: vectorized numpy or reference python "
+            f"[default: {DEFAULT_KERNEL}, python for inputs up to 1 MiB]."
+        ),
+    },
+    {
+        "decls": ["--mmap/--no-mmap"],
+        "dest": "use_mmap",
+        "default": True,
+        "show_default": True,
+        "help": "Map regular files to memory instead of reading them.",
+    },
+    {
+        "decls": ["--jobs", "-j"],
+        "dest": "jobs",
+        "type": int,
+        "min": 1,
+        "default": 1,
+        "help": (
+            "Number of processes counting one big file "
+            "or number of threads counting several files."
+        ),
+    },
+    {
+        "decls": ["--cache"],
+        "dest": "cache_path",
+        "file": True,
+        "default": None,
+        "help": "SQLite file to cache statistics of files between runs.",
+    },
+]
+
+
+def wc_func(file_path, kernel, use_mmap, jobs, cache_path):
+    """Simple function that works like `wc` Linux utility
 
     Parameters
     ----------
     file_path : str
         The path to the text file to process.
+    kernel : str or None
+        The name of the function from `KERNELS` that counts statistics,
+        None means `DEFAULT_KERNEL` for big inputs, see `wc_calc`.
+    use_mmap : bool
+        Whether to map regular files to memory instead of reading them.
+    jobs : int
+        The number of processes counting one big file
+        or the number of threads counting several files.
+    cache_path : str or None
+        The path to SQLite file to cache statistics of files between runs.
     """
     if file_path:
-        if len(file_path) == 1:
-            text = read_text_file(file_path[0])
-            lines_cnt, words_cnt, symbols_cnt = wc_calc(text)
-            print(f"{lines_cnt} {words_cnt} {symbols_cnt} {file_path[0]}")
-        else:
-            wc_output_data = []
-            total = [0, 0, 0]
+        if cache_path:
+            # sqlite3 is imported only with the cache
+            from wc_cache import WcCache
 
-            for file in file_path:
-                text = read_text_file(file)
-                result_wc_calc = wc_calc(text)
+        with WcCache(cache_path) if cache_path else nullcontext() as cache:
+            if len(file_path) == 1:
+                lines_cnt, words_cnt, symbols_cnt = wc_file(
+                    file_path[0], kernel, use_mmap, jobs, cache
+                )
+                print(f"{lines_cnt} {words_cnt} {symbols_cnt} {file_path[0]}")
+            else:
+                n = get_column_width(file_path)
+                total = [0, 0, 0]
 
-                # считаем total
-                result_wc_calc = list(result_wc_calc)
-                total = [sum(i) for i in zip(total, result_wc_calc)]
+                results = wc_files(file_path, kernel, use_mmap, jobs, cache)
+                for result_wc_calc, file in results:
+                    # считаем total
+                    total = [sum(i) for i in zip(total, result_wc_calc)]
 
-                # добавляем строку данные для вывода
-                result_wc_calc = [str(i) for i in result_wc_calc]
-                result_wc_calc.append(file)
-                wc_output_data.append(result_wc_calc)
+                    # выводим строку для файла сразу после его подсчета
+                    result_wc_calc = [str(i) for i in result_wc_calc]
+                    result_wc_calc.append(file)
+                    wc_print([result_wc_calc], n)
 
-            n = len(str(max(total)))
-            total.append("total")
-            wc_output_data.append([str(i) for i in total])
-
-            wc_print(wc_output_data, n)
+                total.append("total")
+                wc_print([[str(i) for i in total]], n)
 
     else:
-        # считываем stdin
-        text = []
-        for line in sys.stdin:
-            text.append(line)
-
-        total = wc_calc(text)
+        # считываем stdin по частям
+        with open_input() as file:
+            total = wc_calc(iter_chunks(file), kernel)
         total = ["\t" + str(i) for i in total]
         total = "".join(total)
         print(total)
 
 
+def main(argv=None, prog_name=None):
+    """Run `wc_func` with parameters from the command line
+
+    Parameters
+    ----------
+    argv : list of str or None, optional
+        The command line arguments, None means `sys.argv[1:]`.
+    prog_name : str or None, optional
+        The name of the program in help and error messages.
+    """
+    run_command(wc_func, WC_OPTIONS, argv=argv, prog_name=prog_name)
+
+
 if __name__ == "__main__":
-    wc_func()
+    main()
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+
+from fastio import get_tail_digest
+
+
+class WcCache:
+    """
+    A class representing on-disk cache of wc statistics of files.
+
+    The statistics are stored in SQLite database for every file identified
+    by its device and inode numbers together with the size and modification
+    time of the file. If the file did not change, its statistics are taken
+    from the cache. If the file only grew (like logs do), only the appended
+    part has to be counted. To check that the file was appended and not
+    rewritten, the digest of the last bytes of the counted part is stored.
+
+    The object can be used from several threads and as a context manager,
+    changes are committed when it is closed.
+
+    Attributes
+    ----------
+    path : str
+        The path to the SQLite database file.
+    """
+
+    def __init__(self, path):
+        """
+        Open the cache, the database file is created if it does not exist.
+
+        Parameters
+        ----------
+        path : str
+            The path to the SQLite database file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS wc_cache ("
+            "dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "lines INTEGER, words INTEGER, bytes INTEGER, tail_digest BLOB, "
+            "PRIMARY KEY (dev, ino))"
+        )
+
+    def get(self, file_path, file_stat):
+        """
+        Get cached statistics of the file or of its beginning.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the regular file.
+        file_stat : os.stat_result
+            The current stat of the file.
+
+        Returns
+        -------
+        counts : tuple of int
+            numbers of lines, words and bytes in the first `size` bytes
+            of the file, zeros if nothing is cached.
+        size : int
+            The size of the beginning of the file which statistics are cached.
+            If it is equal to the size of the file, nothing has to be counted.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, lines, words, bytes, tail_digest "
+                "FROM wc_cache WHERE dev = ? AND ino = ?",
+                (file_stat.st_dev, file_stat.st_ino),
+            ).fetchone()
+
+        if row is None:
+            return (0, 0, 0), 0
+
+        size, mtime_ns, lines_cnt, words_cnt, bytes_cnt, tail_digest = row
+        if size == file_stat.st_size and mtime_ns == file_stat.st_mtime_ns:
+            return (lines_cnt, words_cnt, bytes_cnt), size
+
+        if size < file_stat.st_size and tail_digest == get_tail_digest(file_path, size):
+            return (lines_cnt, words_cnt, bytes_cnt), size
+
+        return (0, 0, 0), 0
+
+    def put(self, file_path, file_stat, counts):
+        """
+        Store statistics of the file.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the regular file.
+        file_stat : os.stat_result
+            The stat of the file taken before counting.
+        counts : tuple of int
+            numbers of lines, words and bytes in the first `file_stat.st_size`
+            bytes of the file.
+        """
+        tail_digest = get_tail_digest(file_path, file_stat.st_size)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO wc_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_stat.st_dev,
+                    file_stat.st_ino,
+                    file_stat.st_size,
+                    file_stat.st_mtime_ns,
+                    *counts,
+                    tail_digest,
+                ),
+            )
+
+    def close(self):
+        """
+        Commit the changes and close the cache.
+        """
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
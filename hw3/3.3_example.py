@@ -37,20 +37,29 @@ if __name__ == "__main__":
     file_path = os.path.join(artifacts_folder_path, "AB.txt")
     AB.write_to_file(file_path)
 
-    print("\nУмножение матриц C и D без кэширования:")
-    # Сбросим cache, чтобы вынудить произвести честный расчет произведения
-    # матриц C и D несмотря на коллизию хэшей матриц.
-    # Иначе получим cache в виде матрицы AB
-    FunctionalArithmeticHashMatrix.clear_cache()
-
+    print("\nУмножение матриц C и D:")
+    # Для прежней hash функции (сумма элементов по модулю 100000) хэши матриц
+    # A и C совпадали, а B и D равны, но cache произведений использует
+    # стойкие дайджесты содержимого матриц, поэтому произведение матриц
+    # C и D вычисляется честно и не совпадает с AB
     CD = C @ D
     print(CD)
     file_path = os.path.join(artifacts_folder_path, "CD.txt")
     CD.write_to_file(file_path)
 
+    print("\nПовторное умножение матриц A и B берется из cache:")
+    # cache возвращает копию произведения, поэтому изменения AB не портят cache
+    hits = FunctionalArithmeticHashMatrix.matmul_cache.hits
+    assert (A @ B).matrix == AB.matrix
+    assert FunctionalArithmeticHashMatrix.matmul_cache.hits == hits + 1
+    print(FunctionalArithmeticHashMatrix.matmul_cache.get_stats())
+
     print("\nХэш матриц AB и CD")
-    # для нашей hash функции hash(AB) == hash(CD)
-    CD_hash = hash(AB)
+    # для прежней hash функции hash(AB) == hash(CD) == 134,
+    # hash функция на основе дайджеста BLAKE2 различает эти матрицы
+    AB_hash, CD_hash = hash(AB), hash(CD)
+    print(AB_hash)
     print(CD_hash)
+    assert AB_hash != CD_hash
     file_path = os.path.join(artifacts_folder_path, "hash.txt")
-    write_text_to_file(str(CD_hash), file_path)
+    write_text_to_file(f"{AB_hash}\n{CD_hash}", file_path)
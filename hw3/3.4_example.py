@@ -0,0 +1,71 @@
+import os
+import time
+
+import numpy as np
+from matrix import FunctionalMatrix, write_text_to_file
+
+if __name__ == "__main__":
+    # Set the seed
+    np.random.seed(0)
+
+    # Set path to store artifacts
+    artifacts_folder_path = "hw3/artifacts/3.4"
+    os.makedirs(artifacts_folder_path, exist_ok=True)
+
+    # Целочисленные матрицы: результаты должны совпадать точно
+    matrix1_np = np.random.randint(0, 10, (10, 10))
+    matrix1 = FunctionalMatrix(matrix1_np.tolist())
+
+    matrix2_np = np.random.randint(0, 10, (10, 10))
+    matrix2 = FunctionalMatrix(matrix2_np.tolist())
+
+    print("\nУмножение матриц алгоритмом Штрассена:")
+    print("Matrix module")
+    # малый порог, чтобы матрицы 10x10 дополнялись до 16x16 и делились рекурсивно
+    matrix_prod = matrix1.matmul(matrix2, algorithm="strassen", threshold=2)
+    print(matrix_prod)
+    file_path = os.path.join(artifacts_folder_path, "matrix@.txt")
+    matrix_prod.write_to_file(file_path)
+    print("Numpy")
+    print(matrix1_np @ matrix2_np)
+
+    classic_prod = matrix1.matmul(matrix2, algorithm="blocked")
+    assert matrix_prod.matrix == classic_prod.matrix
+    assert matrix_prod.matrix == (matrix1_np @ matrix2_np).tolist()
+
+    # Вещественные матрицы не квадратные: сравниваем ошибки округления
+    matrix1_np = np.random.uniform(-1, 1, (100, 70))
+    matrix1 = FunctionalMatrix(matrix1_np.tolist())
+
+    matrix2_np = np.random.uniform(-1, 1, (70, 90))
+    matrix2 = FunctionalMatrix(matrix2_np.tolist())
+
+    strassen_prod = np.array(
+        matrix1.matmul(matrix2, algorithm="strassen", threshold=8).matrix
+    )
+    classic_prod = np.array(matrix1.matmul(matrix2, algorithm="blocked").matrix)
+    numpy_prod = matrix1_np @ matrix2_np
+
+    strassen_error = np.abs(strassen_prod - numpy_prod).max()
+    classic_error = np.abs(classic_prod - numpy_prod).max()
+    print("\nМаксимальная ошибка относительно Numpy для матриц 100x70 и 70x90:")
+    print(f"strassen: {strassen_error:.3e}")
+    print(f"blocked: {classic_error:.3e}")
+    assert strassen_error < 1e-12
+
+    # Время умножения матриц 256x256
+    matrix_np = np.random.uniform(-1, 1, (256, 256))
+    matrix = FunctionalMatrix(matrix_np.tolist())
+
+    print("\nВремя умножения матриц 256x256:")
+    for algorithm in ["blocked", "strassen"]:
+        start_time = time.perf_counter()
+        matrix.matmul(matrix, algorithm=algorithm)
+        print(f"{algorithm}: {time.perf_counter() - start_time:.3f} s")
+
+    text = (
+        f"strassen max error: {strassen_error:.3e}\n"
+        f"blocked max error: {classic_error:.3e}"
+    )
+    file_path = os.path.join(artifacts_folder_path, "accuracy.txt")
+    write_text_to_file(text, file_path)
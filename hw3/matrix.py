@@ -1,5 +1,37 @@
+import copy
+import hashlib
+import os
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+from operator import add, mul, sub
+
 import numpy as np
 
+# size of square blocks of the result computed by `blocked_matmul`
+MATMUL_BLOCK_SIZE = 32
+# size of matrices multiplied by `blocked_matmul` instead of recursion of `strassen_matmul`
+STRASSEN_THRESHOLD = 64
+# default capacity of `MatmulCache`: number of products and their total size in bytes
+MATMUL_CACHE_MAX_ENTRIES = 128
+MATMUL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# approximate size of element of matrix stored in list of list:
+# pointer in the list and int or float object
+LIST_ELEM_NBYTES = 32
+# maximum fraction of nonzero elements of sparse results of `SparseStorageMixin`,
+# denser results are converted to dense matrices
+SPARSE_DENSITY_THRESHOLD = 0.1
+# number of elements of rows of dense matrix gathered at once by `csr_matmul`
+CSR_MATMUL_BLOCK_ELEMENTS = 2**20
+# element-wise operators of `LazyMatrix`: names for error messages and numpy ufuncs
+LAZY_ELEMENTWISE_OPERATORS = {
+    "+": ("addition", np.add),
+    "-": ("subtraction", np.subtract),
+    "*": ("multiplication", np.multiply),
+    "/": ("division", np.true_divide),
+}
+
 
 def write_text_to_file(text, path_to_file):
     """Writes a given text to a text file at the specified path.
@@ -21,6 +53,530 @@ def write_text_to_file(text, path_to_file):
         file.write(text_of_matrix)
 
 
+def numpy_matmul(matrix1, matrix2):
+    """Multiplies two numpy arrays by BLAS kernels.
+
+    NumPy multiplies integer arrays by its own loops without BLAS, they are
+    much slower than BLAS kernels for floats. So integer arrays are
+    multiplied as float64 arrays if every element of the result
+    and every partial sum are exactly representable in float64.
+
+    Parameters
+    ----------
+    matrix1 : numpy.ndarray
+        The first 2D array.
+    matrix2 : numpy.ndarray
+        The second 2D array.
+
+    Returns
+    -------
+    numpy.ndarray
+        The product of the arrays with the same dtype as `matrix1 @ matrix2`.
+    """
+    is_integer = matrix1.dtype.kind in "iu" and matrix2.dtype.kind in "iu"
+    if is_integer and matrix1.size and matrix2.size:
+        max1 = max(abs(int(matrix1.min())), abs(int(matrix1.max())))
+        max2 = max(abs(int(matrix2.min())), abs(int(matrix2.max())))
+        # float64 represents exactly all integers up to 2**53
+        if max1 * max2 * matrix1.shape[1] < 2**53:
+            result = matrix1.astype(np.float64) @ matrix2.astype(np.float64)
+            return result.astype(np.result_type(matrix1, matrix2))
+
+    return matrix1 @ matrix2
+
+
+def blocked_matmul(matrix1, matrix2, block_size=MATMUL_BLOCK_SIZE):
+    """Multiplies two matrices stored in list of list by pure Python.
+
+    The second matrix is transposed once, so every element of the result is
+    the dot product of a row of the first matrix and a row of the transposed
+    matrix computed by `sum(map(operator.mul, ...))` without Python loops.
+    The result is computed by square blocks of `block_size` rows and
+    columns, so the rows and columns of a block are reused while they are
+    in the cache of the processor.
+
+    The elements are summed in the same order as in
+    `Matrix.get_matrix_dot_product_elem`, so the results are the same.
+
+    Parameters
+    ----------
+    matrix1 : list of list
+        The first matrix.
+    matrix2 : list of list
+        The second matrix, its number of rows is the number of columns
+        of the first one.
+    block_size : int, optional
+        The size of blocks of the result.
+
+    Returns
+    -------
+    list of list
+        The product of the matrices.
+
+    Examples
+    --------
+    >>> blocked_matmul([[1, 2], [3, 4]], [[5, 6], [7, 8]])
+    [[19, 22], [43, 50]]
+    """
+    columns = list(zip(*matrix2))
+    result = [[0] * len(columns) for _ in range(len(matrix1))]
+
+    for j in range(0, len(columns), block_size):
+        columns_block = columns[j : j + block_size]
+        for i in range(0, len(matrix1), block_size):
+            for row, result_row in zip(
+                matrix1[i : i + block_size], result[i : i + block_size]
+            ):
+                result_row[j : j + block_size] = [
+                    sum(map(mul, row, column)) for column in columns_block
+                ]
+
+    return result
+
+
+def add_matrices(matrix1, matrix2, operation=add):
+    """Applies the operation element-wise to two matrices stored in list of list.
+
+    Parameters
+    ----------
+    matrix1 : list of list
+        The first matrix.
+    matrix2 : list of list
+        The second matrix of the same shape.
+    operation : callable, optional
+        The binary operation, e.g. `operator.add` or `operator.sub`.
+
+    Returns
+    -------
+    list of list
+        The result of the operation.
+    """
+    return [list(map(operation, row1, row2)) for row1, row2 in zip(matrix1, matrix2)]
+
+
+def split_matrix(matrix):
+    """Splits square matrix of even size stored in list of list into four quadrants.
+
+    Parameters
+    ----------
+    matrix : list of list
+        The square matrix of even size.
+
+    Returns
+    -------
+    tuple of list of list
+        The top left, top right, bottom left and bottom right quadrants.
+    """
+    half = len(matrix) // 2
+    top, bottom = matrix[:half], matrix[half:]
+    return (
+        [row[:half] for row in top],
+        [row[half:] for row in top],
+        [row[:half] for row in bottom],
+        [row[half:] for row in bottom],
+    )
+
+
+def strassen_square_matmul(matrix1, matrix2, threshold, block_size=MATMUL_BLOCK_SIZE):
+    """Multiplies two square matrices of the same size by Strassen algorithm.
+
+    Parameters
+    ----------
+    matrix1 : list of list
+        The first square matrix.
+    matrix2 : list of list
+        The second square matrix.
+    threshold : int
+        Matrices of this size or smaller and matrices of odd size are
+        multiplied by `blocked_matmul`.
+    block_size : int, optional
+        The size of blocks of `blocked_matmul`.
+
+    Returns
+    -------
+    list of list
+        The product of the matrices.
+    """
+    if len(matrix1) <= threshold or len(matrix1) % 2:
+        return blocked_matmul(matrix1, matrix2, block_size)
+
+    a11, a12, a21, a22 = split_matrix(matrix1)
+    b11, b12, b21, b22 = split_matrix(matrix2)
+
+    # 7 умножений половинных матриц вместо 8
+    m1 = strassen_square_matmul(
+        add_matrices(a11, a22), add_matrices(b11, b22), threshold, block_size
+    )
+    m2 = strassen_square_matmul(add_matrices(a21, a22), b11, threshold, block_size)
+    m3 = strassen_square_matmul(a11, add_matrices(b12, b22, sub), threshold, block_size)
+    m4 = strassen_square_matmul(a22, add_matrices(b21, b11, sub), threshold, block_size)
+    m5 = strassen_square_matmul(add_matrices(a11, a12), b22, threshold, block_size)
+    m6 = strassen_square_matmul(
+        add_matrices(a21, a11, sub), add_matrices(b11, b12), threshold, block_size
+    )
+    m7 = strassen_square_matmul(
+        add_matrices(a12, a22, sub), add_matrices(b21, b22), threshold, block_size
+    )
+
+    c11 = add_matrices(add_matrices(m1, m4), add_matrices(m7, m5, sub))
+    c12 = add_matrices(m3, m5)
+    c21 = add_matrices(m2, m4)
+    c22 = add_matrices(add_matrices(m1, m2, sub), add_matrices(m3, m6))
+
+    top = [row1 + row2 for row1, row2 in zip(c11, c12)]
+    bottom = [row1 + row2 for row1, row2 in zip(c21, c22)]
+    return top + bottom
+
+
+def strassen_matmul(
+    matrix1, matrix2, threshold=STRASSEN_THRESHOLD, block_size=MATMUL_BLOCK_SIZE
+):
+    """Multiplies two matrices stored in list of list by Strassen algorithm.
+
+    Strassen algorithm multiplies matrices by 7 multiplications of half size
+    matrices instead of 8, so its complexity is O(n**2.81) instead of O(n**3).
+    The matrices are padded by zeros to square matrices of size
+    `m * 2**k`, where `m <= threshold`, so they are halved `k` times,
+    and matrices of size `m` are multiplied by `blocked_matmul`.
+
+    The result is the same as the result of `blocked_matmul` for integers,
+    for floats it differs by rounding errors.
+
+    Parameters
+    ----------
+    matrix1 : list of list
+        The first matrix.
+    matrix2 : list of list
+        The second matrix, its number of rows is the number of columns
+        of the first one.
+    threshold : int, optional
+        The crossover size: matrices of this size or smaller are multiplied
+        by `blocked_matmul`, at least 1.
+    block_size : int, optional
+        The size of blocks of `blocked_matmul`.
+
+    Returns
+    -------
+    list of list
+        The product of the matrices.
+
+    Raises
+    ------
+    ValueError
+        If the threshold is less than 1.
+
+    Examples
+    --------
+    >>> strassen_matmul([[1, 2], [3, 4]], [[5, 6], [7, 8]], threshold=1)
+    [[19, 22], [43, 50]]
+    """
+    if threshold < 1:
+        raise ValueError(f"The threshold must be at least 1, got {threshold}")
+
+    rows, cols = len(matrix1), len(matrix2[0])
+    size = max(rows, len(matrix2), cols)
+    if size <= threshold:
+        return blocked_matmul(matrix1, matrix2, block_size)
+
+    halvings = 0
+    while size > threshold << halvings:
+        halvings += 1
+    # the smallest size m * 2**halvings that is not less than size
+    padded_size = -(-size >> halvings) << halvings
+
+    def pad(matrix):
+        padded = [list(row) + [0] * (padded_size - len(row)) for row in matrix]
+        padded.extend([0] * padded_size for _ in range(padded_size - len(matrix)))
+        return padded
+
+    result = strassen_square_matmul(pad(matrix1), pad(matrix2), threshold, block_size)
+    return [row[:cols] for row in result[:rows]]
+
+
+def matmul_flops(rows, inner, cols):
+    """Estimates the number of floating point operations of matrix multiplication.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the first matrix.
+    inner : int
+        The number of columns of the first matrix and rows of the second one.
+    cols : int
+        The number of columns of the second matrix.
+
+    Returns
+    -------
+    int
+        The number of multiplications and additions of elements.
+    """
+    return 2 * rows * inner * cols
+
+
+def matrix_chain_order(shapes):
+    """Finds the optimal order of multiplications of the chain of matrices.
+
+    The classic dynamic programming: the cheapest product of the matrices
+    from i to j is split by k into the cheapest products from i to k and
+    from k + 1 to j, the best k is found for all O(n**2) pairs (i, j),
+    so the complexity is O(n**3).
+
+    Parameters
+    ----------
+    shapes : list of tuple of int
+        The numbers of rows and columns of the matrices of the chain.
+
+    Returns
+    -------
+    flops : int
+        The estimated number of operations of the optimal order.
+    splits : list of list of int
+        `splits[i][j]` is the index of the last matrix of the left factor
+        of the optimal product of the matrices from i to j.
+
+    Examples
+    --------
+    >>> flops, splits = matrix_chain_order([(10, 100), (100, 5), (5, 50)])
+    >>> flops, splits[0][2]
+    (15000, 1)
+    """
+    count = len(shapes)
+    costs = [[0] * count for _ in range(count)]
+    splits = [[i] * count for i in range(count)]
+    for length in range(2, count + 1):
+        for i in range(count - length + 1):
+            j = i + length - 1
+            costs[i][j], splits[i][j] = min(
+                (
+                    costs[i][k]
+                    + costs[k + 1][j]
+                    + matmul_flops(shapes[i][0], shapes[k][1], shapes[j][1]),
+                    k,
+                )
+                for k in range(i, j)
+            )
+    return costs[0][count - 1], splits
+
+
+def multiply_chain(matrices, splits, i, j):
+    """Multiplies the matrices from i to j in the order found by `matrix_chain_order`.
+
+    Parameters
+    ----------
+    matrices : list of Matrix
+        The chain of matrices.
+    splits : list of list of int
+        The splits of the optimal products, see `matrix_chain_order`.
+    i : int
+        The index of the first matrix.
+    j : int
+        The index of the last matrix.
+
+    Returns
+    -------
+    Matrix
+        The product of the matrices.
+    """
+    if i == j:
+        return matrices[i]
+    k = splits[i][j]
+    return multiply_chain(matrices, splits, i, k) @ multiply_chain(
+        matrices, splits, k + 1, j
+    )
+
+
+def matrix_digest(matrix):
+    """Computes strong digest of the content of matrix by BLAKE2.
+
+    The matrix is converted to numpy array, and the digest is computed over
+    its dtype, shape and raw buffer. So matrices with equal values of
+    the same shape and type have equal digests, and collisions of different
+    matrices are practically impossible.
+
+    Parameters
+    ----------
+    matrix : list of list or numpy.ndarray
+        The matrix.
+
+    Returns
+    -------
+    bytes
+        The 16 bytes digest.
+    """
+    array = np.ascontiguousarray(matrix)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    if array.dtype.kind == "O":
+        # buffer of object array contains pointers, e.g. for big integers
+        digest.update(repr(array.tolist()).encode())
+    else:
+        digest.update(array.data)
+    return digest.digest()
+
+
+def create_shared_array(array):
+    """Copies numpy array to new block of shared memory.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        The array to copy.
+
+    Returns
+    -------
+    shm : multiprocessing.shared_memory.SharedMemory
+        The block of shared memory, it must be closed and unlinked by
+        the caller.
+    description : tuple
+        The name of the block, the shape and the dtype of the array,
+        see `attach_shared_array`.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared_array[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_shared_array(description):
+    """Attaches numpy array stored in block of shared memory by another process.
+
+    Parameters
+    ----------
+    description : tuple
+        The name of the block, the shape and the dtype of the array.
+
+    Returns
+    -------
+    shm : multiprocessing.shared_memory.SharedMemory
+        The block of shared memory, it must be closed after the array is used.
+    array : numpy.ndarray
+        The array using the block as its buffer.
+    """
+    name, shape, dtype = description
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def matmul_rows_block(
+    description1, description2, result_description, start, end, block_size
+):
+    """Multiplies block of rows of the first matrix by the second matrix in worker process.
+
+    The matrices and the result are stored in shared memory, so they are
+    not pickled. The block of the product is computed by `blocked_matmul`
+    and written directly to the result.
+
+    Parameters
+    ----------
+    description1 : tuple
+        The description of the first matrix in shared memory.
+    description2 : tuple
+        The description of the second matrix in shared memory.
+    result_description : tuple
+        The description of the result in shared memory.
+    start : int
+        The index of the first row of the block.
+    end : int
+        The index of the row after the last row of the block.
+    block_size : int
+        The size of blocks for `blocked_matmul`.
+    """
+    shms = []
+    try:
+        arrays = []
+        for description in [description1, description2, result_description]:
+            shm, array = attach_shared_array(description)
+            shms.append(shm)
+            arrays.append(array)
+        array1, array2, result = arrays
+
+        rows_block = blocked_matmul(
+            array1[start:end].tolist(), array2.tolist(), block_size
+        )
+        result[start:end] = rows_block
+        # views of the buffers must be deleted before the blocks are closed
+        del array1, array2, result, arrays
+    finally:
+        for shm in shms:
+            shm.close()
+
+
+def parallel_matmul(matrix1, matrix2, n_jobs=None, block_size=MATMUL_BLOCK_SIZE):
+    """Multiplies two matrices stored in list of list by parallel processes.
+
+    The rows of the product are split into `n_jobs` blocks that are computed
+    by `blocked_matmul` in a pool of processes. The matrices are copied once
+    to blocks of `multiprocessing.shared_memory`, so they are not pickled
+    for every task, and the processes write the blocks of the product
+    directly to shared memory.
+
+    The matrices must consist of integers or floats. Integer matrices whose
+    product may overflow int64 and matrices of other types are multiplied
+    by `blocked_matmul` in the current process.
+
+    Parameters
+    ----------
+    matrix1 : list of list
+        The first matrix.
+    matrix2 : list of list
+        The second matrix, its number of rows is the number of columns
+        of the first one.
+    n_jobs : int or None, optional
+        The number of processes, None means the number of processors.
+    block_size : int, optional
+        The size of blocks for `blocked_matmul`.
+
+    Returns
+    -------
+    list of list
+        The product of the matrices.
+    """
+    array1, array2 = np.asarray(matrix1), np.asarray(matrix2)
+    dtype = np.result_type(array1, array2)
+    is_supported = dtype.kind in "iuf" and array1.ndim == array2.ndim == 2
+    if is_supported and dtype.kind in "iu":
+        max1 = max(abs(int(array1.min())), abs(int(array1.max())))
+        max2 = max(abs(int(array2.min())), abs(int(array2.max())))
+        is_supported = max1 * max2 * array1.shape[1] < 2**63
+    n_jobs = min(n_jobs or os.cpu_count(), len(matrix1))
+    if not is_supported or n_jobs == 1:
+        return blocked_matmul(matrix1, matrix2, block_size)
+
+    result = np.zeros((array1.shape[0], array2.shape[1]), dtype=dtype)
+    bounds = [len(matrix1) * i // n_jobs for i in range(n_jobs + 1)]
+
+    shms = []
+    try:
+        descriptions = []
+        for array in [array1, array2, result]:
+            shm, description = create_shared_array(array)
+            shms.append(shm)
+            descriptions.append(description)
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            list(
+                executor.map(
+                    matmul_rows_block,
+                    [descriptions[0]] * n_jobs,
+                    [descriptions[1]] * n_jobs,
+                    [descriptions[2]] * n_jobs,
+                    bounds[:-1],
+                    bounds[1:],
+                    [block_size] * n_jobs,
+                )
+            )
+
+        shared_result = np.ndarray(result.shape, dtype=dtype, buffer=shms[2].buf)
+        product = shared_result.tolist()
+        # the view of the buffer must be deleted before the block is closed
+        del shared_result
+        return product
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
 class Matrix:
     """
     A class representing a matrix.
@@ -33,8 +589,24 @@ class Matrix:
         The number of rows in the matrix.
     cols : int
         The number of columns in the matrix.
+    block_size : int
+        The size of blocks of the result of matrix multiplication,
+        see `blocked_matmul`.
+    matmul_algorithm : str
+        The name of the algorithm of matrix multiplication used by `@`.
+    matmul_algorithms : dict
+        The functions multiplying matrices stored in list of list by names
+        of the algorithms.
     """
 
+    block_size = MATMUL_BLOCK_SIZE
+    matmul_algorithm = "blocked"
+    matmul_algorithms = {
+        "blocked": blocked_matmul,
+        "strassen": strassen_matmul,
+        "parallel": parallel_matmul,
+    }
+
     def __init__(self, matrix: list) -> None:
         """
         Initialize a Matrix object.
@@ -119,6 +691,8 @@ class Matrix:
         """
         Perform matrix multiplication.
 
+        The product is computed by `matmul` with the algorithm `matmul_algorithm`.
+
         Parameters
         ----------
         other : Matrix
@@ -134,6 +708,41 @@ class Matrix:
         ValueError
             If the number of columns of the first matrix does not match the number of rows of the second matrix.
 
+        """
+        return self.matmul(other)
+
+    def matmul(self, other: "Matrix", algorithm=None, **options) -> "Matrix":
+        """
+        Perform matrix multiplication by the given algorithm.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+        algorithm : str or None, optional
+            The name of the algorithm from `matmul_algorithms`:
+            "blocked" - `blocked_matmul`, "strassen" - `strassen_matmul`,
+            "parallel" - `parallel_matmul`. None means `matmul_algorithm`.
+        **options
+            The options of the algorithm, e.g. `block_size` for "blocked",
+            `threshold` for "strassen" or `n_jobs` for "parallel".
+
+        Returns
+        -------
+        Matrix
+            The result of the matrix multiplication.
+
+        Raises
+        ------
+        ValueError
+            If the number of columns of the first matrix does not match the number of rows of the second matrix
+            or the algorithm is unknown.
+
+        Examples
+        --------
+        >>> matrix = Matrix([[1, 2], [3, 4]])
+        >>> matrix.matmul(matrix, algorithm="strassen", threshold=1).matrix
+        [[7, 10], [15, 22]]
         """
         if self.cols != other.rows:
             message = (
@@ -142,20 +751,110 @@ class Matrix:
             )
             raise ValueError(message)
 
-        result = []
-        for i in range(self.rows):
-            result.append([])
-            for j in range(other.cols):
-                elem = self.get_matrix_dot_product_elem(self, other, i, j)
-                result[i].append(elem)
+        algorithm = algorithm or self.matmul_algorithm
+        if algorithm not in self.matmul_algorithms:
+            message = (
+                f"Unknown matrix multiplication algorithm {algorithm!r},"
+                f" available algorithms: {', '.join(self.matmul_algorithms)}"
+            )
+            raise ValueError(message)
+        if algorithm in ["blocked", "strassen", "parallel"]:
+            options.setdefault("block_size", self.block_size)
 
-        return type(self)(result)
+        matmul_func = self.matmul_algorithms[algorithm]
+        return type(self)(matmul_func(self.matrix, other.matrix, **options))
+
+    def lazy(self) -> "LazyMatrix":
+        """
+        Start lazy expression with the matrix.
+
+        Returns
+        -------
+        LazyMatrix
+            The lazy expression consisting of the matrix.
+
+        Examples
+        --------
+        >>> matrix = Matrix([[1, 2], [3, 4]])
+        >>> expression = (matrix.lazy() + matrix) * matrix
+        >>> expression.matrix
+        [[2, 8], [18, 32]]
+        """
+        return LazyMatrix(self)
+
+    @staticmethod
+    def chain_matmul(*matrices, return_stats=False):
+        """
+        Multiply the chain of matrices in the optimal order.
+
+        The order with the least estimated number of operations is found
+        by `matrix_chain_order` from the shapes of the matrices, for
+        matrices of different shapes it can be orders of magnitude
+        cheaper than `A @ B @ C` computed from left to right.
+
+        Parameters
+        ----------
+        *matrices : Matrix
+            The matrices to multiply.
+        return_stats : bool, optional
+            Whether to return the estimated numbers of operations.
+
+        Returns
+        -------
+        Matrix or tuple of Matrix and dict
+            The product of the matrices and, if `return_stats` is true,
+            the estimated numbers of operations "optimal_flops" and
+            "left_to_right_flops" and their difference "saved_flops".
+
+        Raises
+        ------
+        ValueError
+            If there are no matrices or the number of columns of a matrix
+            does not match the number of rows of the next one.
+
+        Examples
+        --------
+        >>> a, b, c = Matrix([[1, 2]]), Matrix([[3], [4]]), Matrix([[5, 6]])
+        >>> product, stats = Matrix.chain_matmul(a, b, c, return_stats=True)
+        >>> product.matrix
+        [[55, 66]]
+        >>> stats
+        {'optimal_flops': 8, 'left_to_right_flops': 8, 'saved_flops': 0}
+        """
+        if not matrices:
+            raise ValueError("At least one matrix is required for multiplication")
+        for matrix1, matrix2 in zip(matrices, matrices[1:]):
+            if matrix1.cols != matrix2.rows:
+                message = (
+                    "The number of columns of the first matrix must match the number of rows"
+                    " of the second matrix for multiplication"
+                )
+                raise ValueError(message)
+
+        shapes = [(matrix.rows, matrix.cols) for matrix in matrices]
+        optimal_flops, splits = matrix_chain_order(shapes)
+        product = multiply_chain(list(matrices), splits, 0, len(matrices) - 1)
+        if not return_stats:
+            return product
+
+        left_to_right_flops = sum(
+            matmul_flops(shapes[0][0], shape[0], shape[1]) for shape in shapes[1:]
+        )
+        stats = {
+            "optimal_flops": optimal_flops,
+            "left_to_right_flops": left_to_right_flops,
+            "saved_flops": left_to_right_flops - optimal_flops,
+        }
+        return product, stats
 
     @staticmethod
     def get_matrix_dot_product_elem(matrix1, matrix2, i, j):
         """
         Calculate the dot product of the i-th row of matrix1 with the j-th column of matrix2.
 
+        It is the reference implementation of one element of the product,
+        `__matmul__` computes all elements at once by `blocked_matmul`.
+
         Parameters
         ----------
         matrix1 : object
@@ -368,13 +1067,23 @@ class PropertyMixin:
             in numpy.array.tolist() style.
         """
         self._matrix = new_matrix
+        # digest memoized by `HashMixin` belongs to the old matrix
+        self._digest = None
 
 
-class HashMixin:
+class HashMixin(PropertyMixin):
     """A mixin class for objects that need a custom hash implementation.
 
     This class provides a `__hash__` method that computes a hash value
-    based on the sum of the elements in the `matrix` attribute, modulo 100000.
+    from the BLAKE2 digest of the content of the `matrix` attribute.
+    The digest is computed once and memoized on the instance, so repeated
+    `hash()` calls cost O(1). The `matrix` property is inherited from
+    `PropertyMixin`, so the memoized digest is invalidated when a new
+    matrix is assigned, e.g. `matrix_obj.matrix = [[5, 6], [7, 8]]`,
+    and when elements are written with `matrix_obj[i, j] = value`.
+    Elements changed in place through the `matrix` attribute require
+    `invalidate_digest()`, otherwise both `hash()` and `MatmulCache`
+    use the stale digest.
 
     Attributes
     ----------
@@ -385,118 +1094,87 @@ class HashMixin:
     -------
     __hash__()
         Computes and returns the hash value of the object.
+    digest()
+        Returns the memoized digest of the matrix.
+    invalidate_digest()
+        Forgets the memoized digest of the matrix.
+    __setitem__(index, value)
+        Sets the element of the matrix and invalidates the digest.
     """
 
-    def __hash__(self):
+    def digest(self):
         """
-        Computes and returns the hash value of the object.
-
-        The hash value is computed as the sum of the elements in
-        the `matrix` attribute, modulo 100000.
+        Returns the memoized digest of the matrix.
 
         Returns
         -------
-        int
-            The computed hash value.
+        bytes
+            The BLAKE2 digest of the matrix computed by `matrix_digest`.
         """
-        matrix = np.array(self.matrix)
-        hash = int(np.sum(matrix) % 100000)
-        return hash
-
-
-class HashMatrix(Matrix, HashMixin):
-    """A class representing a matrix with a custom hash implementation.
-
-    This class inherits from both the `Matrix` and `HashMixin` classes,
-    providing functionality for matrix operations and a custom hash
-    implementation.
-    It also includes a caching mechanism for matrix
-    multiplication results based on the hash values of the matrices.
-
-    Attributes
-    ----------
-    _hash : set
-        A set used to store the hash values of matrices involved in
-        matrix multiplication operations.
-    _hash_prod_result : Matrix or None
-        A cache for the result of the last matrix multiplication
-        operation involving matrices with hash values stored in `_hash`.
-
-    Methods
-    -------
-    __matmul__(other: Matrix) -> Matrix
-        Perform matrix multiplication with caching based on hash values.
-    clear_cache()
-        Clear the cache for matrix multiplication results.
-    """
+        digest = getattr(self, "_digest", None)
+        if digest is None:
+            digest = self._digest = matrix_digest(self.matrix)
+        return digest
 
-    _hash = set([])
-    _hash_prod_result = None
+    def invalidate_digest(self):
+        """
+        Forgets the memoized digest of the matrix.
 
-    def __matmul__(self, other: "Matrix") -> "Matrix":
+        It must be called after elements of the matrix are changed in place.
         """
-        Perform matrix multiplication with caching based on hash values.
+        self._digest = None
 
-        This method overrides the `__matmul__` method of the `Matrix` class
-        to include caching of matrix multiplication results. If the hash values
-        of the two matrices involved in the multiplication are already stored in
-        the `_hash` set, and the result of their multiplication is cached in
-        `_hash_prod_result`, the cached result is returned instead of
-        performing the multiplication again.
+    def __setitem__(self, index, value):
+        """
+        Sets the element of the matrix and invalidates the digest.
 
         Parameters
         ----------
-        other : Matrix
-            The matrix to multiply with the current matrix.
-
-        Returns
-        -------
-        Matrix
-            The result of the matrix multiplication.
-
-        Raises
-        ------
-        ValueError
-            If the number of columns of the first matrix does not match
-            the number of rows of the second matrix.
+        index : tuple of int
+            The row and the column of the element.
+        value : int or float
+            The new value of the element.
         """
-        hash1, hash2 = hash(self), hash(other)
-        if self._hash_prod_result and hash1 in self._hash and hash2 in self._hash:
-            result = HashMatrix._hash_prod_result
-        else:
-            HashMatrix._hash = set([hash1, hash2])
-            result = super().__matmul__(other)
-            HashMatrix._hash_prod_result = result
-
-        return result
+        i, j = index
+        self.matrix[i][j] = value
+        self.invalidate_digest()
 
-    @staticmethod
-    def clear_cache():
-        """Clear the cache for matrix multiplication results.
+    def __hash__(self):
+        """
+        Computes and returns the hash value of the object.
 
-        This method clears the `_hash_prod_result` attribute, effectively
-        removing any cached results of matrix multiplication operations.
+        The hash value is the first 8 bytes of the digest of the matrix
+        as a signed integer.
 
-        It can be used to avoid hash function collisions.
+        Returns
+        -------
+        int
+            The computed hash value.
         """
-        HashMatrix._hash_prod_result = None
+        return int.from_bytes(self.digest()[:8], "little", signed=True)
 
 
-class ArithmeticMatrix(Matrix, SubMixin, DivMixin):
+class NumpyStorageMixin:
     """
-    A class representing a matrix with arithmetic operations.
+    A mixin class to store the matrix in `numpy.ndarray`.
 
-    This class inherits from the `Matrix` class and mixes in the `SubMixin` and `DivMixin` classes
-    to provide additional functionality for subtraction and division operations.
+    The matrix is converted to 2D `numpy.ndarray` once in the constructor,
+    so element-wise operations are performed by vectorized NumPy kernels and
+    matrix multiplication by BLAS kernels without creating a Python object
+    for every element. `matrix[i][j]`, `rows`, `cols` and the other mixins
+    work the same way as with the matrix stored in list of list.
+
+    The mixin must precede `Matrix` in the method resolution order,
+    e.g. `class NumpyMatrix(NumpyStorageMixin, Matrix)`.
 
     Attributes
     ----------
-    matrix : list of list
-        A 2D list representing the matrix in numpy.array.tolist() style.
-    rows : int
-        The number of rows in the matrix.
-    cols : int
-        The number of columns in the matrix.
+    matrix : numpy.ndarray
+        A 2D array representing the matrix.
+    matmul_algorithm : str
+        The name of the algorithm of matrix multiplication used by `@`.
+    matmul_algorithms : dict
+        The functions multiplying numpy arrays by names of the algorithms.
 
     Methods
     -------
@@ -504,28 +1182,1437 @@ class ArithmeticMatrix(Matrix, SubMixin, DivMixin):
         Add two matrices by element-wise way.
     __mul__(other)
         Multiply two matrices element-wise.
-    __matmul__(other)
-        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
     __sub__(other)
         Perform element-wise subtraction of the current matrix with another matrix.
     __truediv__(other)
         Perform element-wise division of the current matrix with another matrix.
     """
 
-    pass
+    matmul_algorithm = "blas"
+    matmul_algorithms = {"blas": numpy_matmul}
 
+    def __init__(self, matrix) -> None:
+        """
+        Initialize a matrix stored in numpy.ndarray.
 
-class FunctionalMatrix(Matrix, StrMixin, ToTxtFileMixin):
-    """
-    A class representing a matrix with functionalities for string representation and file writing.
+        Parameters
+        ----------
+        matrix : list of list or numpy.ndarray
+            A 2D list or array representing the matrix.
+        """
+        super().__init__(np.asarray(matrix))
+
+    def check_same_shape(self, other, operation):
+        """
+        Check that the matrices have the same shape for element-wise operation.
+
+        Parameters
+        ----------
+        other : Matrix
+            The other matrix of the operation.
+        operation : str
+            The name of the operation for the error message.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        if self.rows != other.rows or self.cols != other.cols:
+            message = f"The matrices must have the same number of rows and columns for {operation}"
+            raise ValueError(message)
+
+    def __add__(self, other):
+        """
+        Add two matrices by element-wise way.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to add to the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the addition.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "addition")
+        return type(self)(self.matrix + np.asarray(other.matrix))
+
+    def __mul__(self, other):
+        """
+        Multiply two matrices element-wise.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the multiplication.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "multiplication")
+        return type(self)(self.matrix * np.asarray(other.matrix))
+
+    def __sub__(self, other):
+        """
+        Performs element-wise subtraction of the current matrix with another matrix.
+
+        Parameters
+        ----------
+        other : Matrix
+            The other matrix to subtract from the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the subtraction.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "subtraction")
+        return type(self)(self.matrix - np.asarray(other.matrix))
+
+    def __truediv__(self, other):
+        """
+        Performs element-wise division of the current matrix with another matrix.
+
+        Parameters
+        ----------
+        other : Matrix
+            The other matrix to divide the current matrix by.
+
+        Returns
+        -------
+        Matrix
+            The result of the division.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "division")
+        return type(self)(self.matrix / np.asarray(other.matrix))
+
+    def matmul(self, other, algorithm=None, **options):
+        """
+        Perform matrix multiplication by the given algorithm.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+        algorithm : str or None, optional
+            The name of the algorithm from `matmul_algorithms`:
+            "blas" - `numpy_matmul`. None means `matmul_algorithm`.
+        **options
+            The options of the algorithm.
+
+        Returns
+        -------
+        Matrix
+            The result of the matrix multiplication.
+
+        Raises
+        ------
+        ValueError
+            If the number of columns of the first matrix does not match the number of rows of the second matrix
+            or the algorithm is unknown.
+        """
+        if self.cols != other.rows:
+            message = (
+                "The number of columns of the first matrix must match the number of rows"
+                " of the second matrix for multiplication"
+            )
+            raise ValueError(message)
+
+        algorithm = algorithm or self.matmul_algorithm
+        if algorithm not in self.matmul_algorithms:
+            message = (
+                f"Unknown matrix multiplication algorithm {algorithm!r},"
+                f" available algorithms: {', '.join(self.matmul_algorithms)}"
+            )
+            raise ValueError(message)
+
+        matmul_func = self.matmul_algorithms[algorithm]
+        return type(self)(matmul_func(self.matrix, np.asarray(other.matrix), **options))
+
+
+class MatmulCache:
+    """A bounded LRU cache of products of matrices.
+
+    Products are keyed by the type of the product and the ordered pair of
+    BLAKE2 digests and shapes of the matrices, so A @ B and B @ A are
+    different entries, and matrices with different content never share
+    an entry. When the number of products or their total size exceed
+    the capacity, the least recently used products are evicted.
+    The cache keeps its own copies of products and returns new copies,
+    so a caller changing its product does not change the cached one.
+
+    Attributes
+    ----------
+    max_entries : int
+        The maximum number of cached products.
+    max_bytes : int
+        The maximum total size of cached products in bytes.
+    nbytes : int
+        The total size of cached products in bytes.
+    hits : int
+        The number of products taken from the cache.
+    misses : int
+        The number of products computed because they were not in the cache.
+
+    Methods
+    -------
+    matmul(matrix1, matrix2, matmul_func)
+        Get the product of matrices from the cache or compute and cache it.
+    get_key(matrix1, matrix2)
+        Get the key of the product of matrices.
+    copy_product(product)
+        Copy the product with its elements.
+    get_stats()
+        Get statistics of the cache.
+    clear()
+        Remove all products from the cache.
+    """
+
+    def __init__(
+        self, max_entries=MATMUL_CACHE_MAX_ENTRIES, max_bytes=MATMUL_CACHE_MAX_BYTES
+    ):
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        max_entries : int, optional
+            The maximum number of cached products.
+        max_bytes : int, optional
+            The maximum total size of cached products in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._products = OrderedDict()
+
+    def __len__(self):
+        """
+        Get the number of cached products.
+
+        Returns
+        -------
+        int
+            The number of cached products.
+        """
+        return len(self._products)
+
+    @staticmethod
+    def get_key(matrix1, matrix2):
+        """
+        Get the key of the product of matrices.
+
+        Parameters
+        ----------
+        matrix1 : Matrix
+            The first matrix.
+        matrix2 : Matrix
+            The second matrix.
+
+        Returns
+        -------
+        tuple
+            The type of the product, the digests and the shapes of the matrices.
+        """
+        digests = []
+        for matrix in [matrix1, matrix2]:
+            # запомненный дайджест сбрасывается сеттером `matrix`, `__setitem__`
+            # и `invalidate_digest()`
+            if hasattr(matrix, "digest"):
+                digests.append(matrix.digest())
+            else:
+                digests.append(matrix_digest(matrix.matrix))
+        return (
+            type(matrix1),
+            digests[0],
+            (matrix1.rows, matrix1.cols),
+            digests[1],
+            (matrix2.rows, matrix2.cols),
+        )
+
+    @staticmethod
+    def get_nbytes(matrix):
+        """
+        Get the approximate size of matrix in bytes.
+
+        Parameters
+        ----------
+        matrix : Matrix
+            The matrix.
+
+        Returns
+        -------
+        int
+            The size of the buffer of numpy array or the approximate size
+            of list of list.
+        """
+        if isinstance(matrix, SparseStorageMixin):
+            return matrix.nbytes
+        if isinstance(matrix.matrix, np.ndarray):
+            return matrix.matrix.nbytes
+        return matrix.rows * matrix.cols * LIST_ELEM_NBYTES
+
+    @staticmethod
+    def copy_product(product):
+        """
+        Copy the product with its elements.
+
+        Parameters
+        ----------
+        product : Matrix
+            The product of matrices.
+
+        Returns
+        -------
+        Matrix
+            The matrix of the same class with copies of the list of list or
+            the arrays of the product. The elements themselves are numbers,
+            so they are not copied.
+        """
+        product_copy = copy.copy(product)
+        if isinstance(product, SparseStorageMixin):
+            product_copy.set_csr(
+                product.data.copy(),
+                product.indices.copy(),
+                product.indptr.copy(),
+                (product.rows, product.cols),
+            )
+        elif isinstance(product.matrix, np.ndarray):
+            product_copy.matrix = product.matrix.copy()
+        else:
+            product_copy.matrix = [list(row) for row in product.matrix]
+        return product_copy
+
+    def matmul(self, matrix1, matrix2, matmul_func):
+        """
+        Get the product of matrices from the cache or compute and cache it.
+
+        Parameters
+        ----------
+        matrix1 : Matrix
+            The first matrix.
+        matrix2 : Matrix
+            The second matrix.
+        matmul_func : callable
+            The method of `matrix1` computing its product by `matrix2`
+            without the cache, e.g. `Matrix.__matmul__` bound to `matrix1`.
+
+        Returns
+        -------
+        Matrix
+            The product of the matrices. The cache stores its own copy of
+            the product and returns new copies, so changes of the product
+            by a caller do not affect other callers.
+        """
+        key = self.get_key(matrix1, matrix2)
+        if key in self._products:
+            self.hits += 1
+            self._products.move_to_end(key)
+            return self.copy_product(self._products[key])
+
+        self.misses += 1
+        product = matmul_func(matrix2)
+        nbytes = self.get_nbytes(product)
+        if nbytes > self.max_bytes or self.max_entries < 1:
+            return product
+
+        self._products[key] = self.copy_product(product)
+        self.nbytes += nbytes
+        while len(self._products) > self.max_entries or self.nbytes > self.max_bytes:
+            _, evicted = self._products.popitem(last=False)
+            self.nbytes -= self.get_nbytes(evicted)
+
+        return product
+
+    def get_stats(self):
+        """
+        Get statistics of the cache.
+
+        Returns
+        -------
+        dict
+            The numbers of hits, misses and cached products and their total size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._products),
+            "nbytes": self.nbytes,
+        }
+
+    def clear(self):
+        """
+        Remove all products from the cache, statistics are kept.
+        """
+        self._products.clear()
+        self.nbytes = 0
+
+
+class HashMatrix(Matrix, HashMixin):
+    """A class representing a matrix with a custom hash implementation.
+
+    This class inherits from both the `Matrix` and `HashMixin` classes,
+    providing functionality for matrix operations and a custom hash
+    implementation.
+    It also includes a caching mechanism for matrix
+    multiplication results based on strong digests of the matrices.
+
+    Attributes
+    ----------
+    matmul_cache : MatmulCache
+        The cache of products of matrices. By default it is shared by all
+        instances of the class and its subclasses. A separate cache can be
+        assigned to a subclass or to an instance, the cache of the left
+        operand is used.
+
+    Methods
+    -------
+    __matmul__(other: Matrix) -> Matrix
+        Perform matrix multiplication with caching based on digests.
+    __hash__()
+        Computes the hash value from the memoized digest of the matrix.
+    digest()
+        Returns the memoized digest of the matrix.
+    clear_cache()
+        Clear the cache for matrix multiplication results.
+    """
+
+    matmul_cache = MatmulCache()
+
+    def __matmul__(self, other: "Matrix") -> "Matrix":
+        """
+        Perform matrix multiplication with caching based on digests.
+
+        This method overrides the `__matmul__` method of the `Matrix` class
+        to include caching of matrix multiplication results. If the product
+        of matrices with the same content and shapes in the same order is
+        in `matmul_cache`, the cached result is returned instead of
+        performing the multiplication again.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the matrix multiplication.
+
+        Raises
+        ------
+        ValueError
+            If the number of columns of the first matrix does not match
+            the number of rows of the second matrix.
+        """
+        return self.matmul_cache.matmul(self, other, super().__matmul__)
+
+    @classmethod
+    def clear_cache(cls):
+        """Clear the cache for matrix multiplication results.
+
+        This method removes all products from `matmul_cache` of the class.
+        """
+        cls.matmul_cache.clear()
+
+
+class ArithmeticMatrix(Matrix, SubMixin, DivMixin):
+    """
+    A class representing a matrix with arithmetic operations.
+
+    This class inherits from the `Matrix` class and mixes in the `SubMixin` and `DivMixin` classes
+    to provide additional functionality for subtraction and division operations.
+
+    Attributes
+    ----------
+    matrix : list of list
+        A 2D list representing the matrix in numpy.array.tolist() style.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    """
+
+    pass
+
+
+class FunctionalMatrix(Matrix, StrMixin, ToTxtFileMixin):
+    """
+    A class representing a matrix with functionalities for string representation and file writing.
+
+    This class inherits from the `Matrix` class and mixes in the `StrMixin` and `ToTxtFileMixin` classes
+    to provide additional functionality for string representation and writing the matrix to a text file.
+
+    Attributes
+    ----------
+    matrix : list of list
+        A 2D list representing the matrix in numpy.array.tolist() style.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
+    """
+
+    pass
+
+
+class FunctionalArithmeticMatrix(
+    ArithmeticMatrix, StrMixin, ToTxtFileMixin, PropertyMixin
+):
+    """
+    A class representing a matrix with functionalities for arithmetic operations, string representation, file writing
+    and for getting and setting `matrix` property.
+
+    This class inherits from the `ArithmeticMatrix` class and mixes in the `StrMixin`, `ToTxtFileMixin` and
+    `PropertyMixin` classes to provide additional functionality for arithmetic operations
+    (addition, multiplication, subtraction, division), string representation, writing the matrix to a text file and
+    getting and setting `matrix` property.
+
+    Attributes
+    ----------
+    matrix : list of list
+        A 2D list representing the matrix in numpy.array.tolist() style.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
+    """
+
+    pass
+
+
+class ArithmeticHashMatrix(HashMatrix, SubMixin, DivMixin):
+    """
+    A class representing a matrix with arithmetic operations and a custom hash implementation.
+
+    This class inherits from both the `HashMatrix` and `SubMixin` and `DivMixin` classes,
+    providing functionality for matrix operations, subtraction, division, and a custom hash
+    implementation. It also includes a caching mechanism for matrix multiplication results
+    based on digests of the matrices.
+
+    Attributes
+    ----------
+    matrix : list of list
+        A 2D list representing the matrix in numpy.array.tolist() style.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+    matmul_cache : MatmulCache
+        The cache of products of matrices.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication with caching based on digests.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm without caching.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    clear_cache()
+        Clear the cache for matrix multiplication results.
+    """
+
+    pass
+
+
+class FunctionalArithmeticHashMatrix(
+    ArithmeticHashMatrix, StrMixin, ToTxtFileMixin, PropertyMixin
+):
+    """
+    A class representing a matrix with functionalities for arithmetic operations, string representation, file writing,
+    and for getting and setting `matrix` property, along with a custom hash implementation.
+
+    This class inherits from the `ArithmeticHashMatrix` class and mixes in the `StrMixin`, `ToTxtFileMixin`, and
+    `PropertyMixin` classes to provide additional functionality for arithmetic operations (addition, multiplication,
+    subtraction, division), string representation, writing the matrix to a text file, and getting and setting `matrix`
+    property. It also includes a caching mechanism for matrix multiplication results based on digests of
+    the matrices.
+
+    Attributes
+    ----------
+    matrix : list of list
+        A 2D list representing the matrix in numpy.array.tolist() style.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+    matmul_cache : MatmulCache
+        The cache of products of matrices.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication with caching based on digests.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm without caching.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    clear_cache()
+        Clear the cache for matrix multiplication results.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
+    """
+
+    pass
+
+
+class NumpyMatrix(NumpyStorageMixin, Matrix):
+    """
+    A class representing a matrix stored in `numpy.ndarray`.
+
+    This class inherits from the `Matrix` class and mixes in the `NumpyStorageMixin` class
+    to perform element-wise operations by vectorized NumPy kernels and matrix multiplication by BLAS kernels.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        A 2D array representing the matrix.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    """
+
+    pass
+
+
+class FunctionalArithmeticNumpyMatrix(FunctionalArithmeticMatrix, NumpyMatrix):
+    """
+    A class representing a matrix stored in `numpy.ndarray` with functionalities for arithmetic operations,
+    string representation, file writing and for getting and setting `matrix` property.
+
+    This class inherits from the `FunctionalArithmeticMatrix` and `NumpyMatrix` classes, so it has the same
+    functionality as `FunctionalArithmeticMatrix` and its operations are performed by NumPy.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        A 2D array representing the matrix.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
+    """
+
+    pass
+
+
+class FunctionalArithmeticHashNumpyMatrix(FunctionalArithmeticHashMatrix, NumpyMatrix):
+    """
+    A class representing a matrix stored in `numpy.ndarray` with functionalities for arithmetic operations,
+    string representation, file writing, getting and setting `matrix` property and a custom hash implementation.
+
+    This class inherits from the `FunctionalArithmeticHashMatrix` and `NumpyMatrix` classes, so it has the same
+    functionality as `FunctionalArithmeticHashMatrix` and its operations are performed by NumPy.
+    Matrix multiplication results are cached the same way as in `HashMatrix`.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        A 2D array representing the matrix.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+
+    Methods
+    -------
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    __matmul__(other)
+        Perform matrix multiplication with caching based on digests.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm without caching.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    clear_cache()
+        Clear the cache for matrix multiplication results.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
+    """
+
+    pass
+
+
+def csr_matmul(matrix1, matrix2):
+    """Multiplies sparse matrix by sparse or dense matrix.
+
+    Sparse matrices are multiplied by Gustavson algorithm: every nonzero
+    element `a[i, k]` of the first matrix is multiplied by the nonzero
+    elements of the row `k` of the second matrix, and the products with
+    the same position are summed. Only nonzero elements are multiplied,
+    so the time is proportional to the number of these products.
+
+    A dense matrix is multiplied row by row: the nonzero elements of row
+    `i` of the first matrix are multiplied by the gathered rows `k` of
+    the dense matrix as vector by matrix. Long rows are split into parts,
+    so at most `max(CSR_MATMUL_BLOCK_ELEMENTS, cols)` elements are
+    gathered at once and the peak memory is O(rows * cols + nnz).
+
+    Parameters
+    ----------
+    matrix1 : SparseStorageMixin
+        The first matrix.
+    matrix2 : Matrix
+        The second matrix, sparse or dense.
+
+    Returns
+    -------
+    Matrix
+        The product of the matrices, sparse or dense by its density,
+        see `SparseStorageMixin.from_matrix`.
+    """
+    row_idx, col_idx, data = matrix1.to_coo()
+    shape = (matrix1.rows, matrix2.cols)
+    if isinstance(matrix2, SparseStorageMixin):
+        starts = matrix2.indptr[col_idx]
+        counts = matrix2.indptr[col_idx + 1] - starts
+        # positions of elements of the rows `k` of matrix2 one after another
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        positions = np.repeat(starts, counts) + offsets
+        product = matrix1.from_coo(
+            np.repeat(row_idx, counts),
+            matrix2.indices[positions],
+            np.repeat(data, counts) * matrix2.data[positions],
+            shape,
+        )
+        return matrix1.from_matrix(product)
+
+    dense = np.asarray(matrix2.matrix)
+    result = np.zeros(shape, dtype=np.result_type(data, dense))
+    block_nnz = max(1, CSR_MATMUL_BLOCK_ELEMENTS // max(shape[1], 1))
+    indptr = matrix1.indptr.tolist()
+    for i in np.flatnonzero(np.diff(matrix1.indptr)).tolist():
+        for start in range(indptr[i], indptr[i + 1], block_nnz):
+            stop = min(start + block_nnz, indptr[i + 1])
+            result[i] += data[start:stop] @ dense[col_idx[start:stop]]
+    return matrix1.from_matrix(result)
+
+
+class SparseStorageMixin:
+    """
+    A mixin class to store the matrix in CSR format.
+
+    Only nonzero elements are stored in three numpy arrays of CSR
+    (compressed sparse row) format: `data` are the values of the elements
+    row by row, `indices` are their columns and the elements of row `i`
+    are `data[indptr[i]:indptr[i + 1]]`. Memory and time of operations
+    are proportional to the number of nonzero elements `nnz` instead of
+    `rows * cols`. COO format (rows, columns and values of the elements)
+    is used to build matrices by `from_coo` and to perform
+    element-wise operations.
+
+    Results of operations are sparse matrices of the same class, if their
+    density does not exceed `density_threshold`, otherwise they are
+    converted to dense matrices of `dense_class`.
+
+    The `matrix` property returns the dense `numpy.ndarray`, so `str`,
+    `write_to_file`, `matrix_digest` and operations with dense matrices
+    work as usual. Elements are changed by `matrix[i, j] = value`.
+
+    The mixin must precede `Matrix` in the method resolution order,
+    e.g. `class SparseMatrix(SparseStorageMixin, Matrix)`.
+
+    Attributes
+    ----------
+    data : numpy.ndarray
+        The values of nonzero elements row by row.
+    indices : numpy.ndarray
+        The columns of nonzero elements.
+    indptr : numpy.ndarray
+        The positions of the first elements of rows in `data`, its size
+        is `rows + 1`.
+    rows : int
+        The number of rows in the matrix.
+    cols : int
+        The number of columns in the matrix.
+    density_threshold : float
+        The maximum fraction of nonzero elements of sparse result.
+    dense_class : type
+        The class of dense results.
+    matmul_algorithm : str
+        The name of the algorithm of matrix multiplication used by `@`.
+    matmul_algorithms : dict
+        The functions multiplying sparse matrix by sparse or dense matrix
+        by names of the algorithms.
+
+    Methods
+    -------
+    from_coo(row_idx, col_idx, values, shape)
+        Create sparse matrix from COO format.
+    from_matrix(matrix)
+        Create sparse or dense matrix by the density of the matrix.
+    to_coo()
+        Get the matrix in COO format.
+    to_array()
+        Get the dense numpy array.
+    to_dense()
+        Convert the matrix to dense matrix of `dense_class`.
+    __add__(other)
+        Add two matrices by element-wise way.
+    __mul__(other)
+        Multiply two matrices element-wise.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+    """
+
+    density_threshold = SPARSE_DENSITY_THRESHOLD
+    dense_class = None
+    matmul_algorithm = "csr"
+    matmul_algorithms = {"csr": csr_matmul}
+
+    def __init__(self, matrix) -> None:
+        """
+        Initialize a sparse matrix from dense matrix.
+
+        Parameters
+        ----------
+        matrix : list of list or numpy.ndarray
+            A 2D list or array representing the matrix.
+        """
+        self.matrix = matrix
+
+    @property
+    def matrix(self):
+        """
+        Get the dense matrix.
+
+        Returns
+        -------
+        matrix : numpy.ndarray
+            A new 2D array with the elements of the matrix.
+        """
+        return self.to_array()
+
+    @matrix.setter
+    def matrix(self, new_matrix):
+        """
+        Set the elements of the matrix from dense matrix.
+
+        Parameters
+        ----------
+        new_matrix : list of list or numpy.ndarray
+            A 2D list or array representing the matrix.
+        """
+        array = np.asarray(new_matrix)
+        row_idx, col_idx = np.nonzero(array)
+        indptr = np.zeros(array.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_idx, minlength=array.shape[0]), out=indptr[1:])
+        self.set_csr(array[row_idx, col_idx], col_idx, indptr, array.shape)
+
+    def set_csr(self, data, indices, indptr, shape):
+        """
+        Set the arrays of CSR format.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The values of nonzero elements row by row.
+        indices : numpy.ndarray
+            The sorted columns of nonzero elements in every row.
+        indptr : numpy.ndarray
+            The positions of the first elements of rows in `data`.
+        shape : tuple of int
+            The numbers of rows and columns.
+        """
+        self.data = data
+        self.indices = indices.astype(np.int64, copy=False)
+        self.indptr = indptr
+        self.rows, self.cols = shape
+        # digest memoized by `HashMixin` belongs to the old matrix
+        self._digest = None
+
+    @classmethod
+    def from_coo(cls, row_idx, col_idx, values, shape):
+        """
+        Create sparse matrix from COO format.
+
+        Values of repeated positions are summed, zeros are not stored.
+
+        Parameters
+        ----------
+        row_idx : numpy.ndarray
+            The rows of the elements.
+        col_idx : numpy.ndarray
+            The columns of the elements.
+        values : numpy.ndarray
+            The values of the elements.
+        shape : tuple of int
+            The numbers of rows and columns.
+
+        Returns
+        -------
+        SparseStorageMixin
+            The sparse matrix of the class.
+
+        Examples
+        --------
+        >>> row_idx, col_idx = np.array([1, 0, 1]), np.array([0, 2, 0])
+        >>> sparse = SparseMatrix.from_coo(row_idx, col_idx, np.array([1, 2, 3]), (2, 3))
+        >>> sparse.to_array().tolist()
+        [[0, 0, 2], [4, 0, 0]]
+        """
+        keys = np.asarray(row_idx, dtype=np.int64) * shape[1] + col_idx
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], np.asarray(values)[order]
+        if keys.size:
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            keys, values = keys[starts], np.add.reduceat(values, starts)
+        nonzero = values != 0
+        row_idx, col_idx = np.divmod(keys[nonzero], shape[1])
+
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_idx, minlength=shape[0]), out=indptr[1:])
+        sparse = cls.__new__(cls)
+        sparse.set_csr(values[nonzero], col_idx, indptr, shape)
+        return sparse
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """
+        Create sparse or dense matrix by the density of the matrix.
+
+        Parameters
+        ----------
+        matrix : SparseStorageMixin, Matrix, list of list or numpy.ndarray
+            The matrix.
+
+        Returns
+        -------
+        Matrix
+            The sparse matrix of the class, if the fraction of nonzero
+            elements does not exceed `density_threshold`, otherwise
+            the dense matrix of `dense_class`.
+        """
+        if isinstance(matrix, SparseStorageMixin):
+            if matrix.density > cls.density_threshold:
+                return cls.dense_class(matrix.to_array())
+            return matrix
+
+        array = np.asarray(getattr(matrix, "matrix", matrix))
+        if np.count_nonzero(array) > cls.density_threshold * array.size:
+            return cls.dense_class(array)
+        return cls(array)
+
+    @property
+    def nnz(self):
+        """
+        Get the number of stored nonzero elements.
+
+        Returns
+        -------
+        int
+            The number of nonzero elements.
+        """
+        return self.data.size
+
+    @property
+    def density(self):
+        """
+        Get the fraction of nonzero elements.
+
+        Returns
+        -------
+        float
+            The number of nonzero elements divided by `rows * cols`.
+        """
+        return self.nnz / (self.rows * self.cols)
+
+    @property
+    def nbytes(self):
+        """
+        Get the size of the arrays of CSR format in bytes.
+
+        Returns
+        -------
+        int
+            The total size of `data`, `indices` and `indptr`.
+        """
+        return self.data.nbytes + self.indices.nbytes + self.indptr.nbytes
+
+    def to_coo(self):
+        """
+        Get the matrix in COO format.
+
+        Returns
+        -------
+        row_idx : numpy.ndarray
+            The rows of nonzero elements.
+        col_idx : numpy.ndarray
+            The columns of nonzero elements.
+        values : numpy.ndarray
+            The values of nonzero elements.
+        """
+        row_idx = np.repeat(np.arange(self.rows), np.diff(self.indptr))
+        return row_idx, self.indices, self.data
+
+    def get_keys(self):
+        """
+        Get the positions of nonzero elements in the flattened matrix.
+
+        Returns
+        -------
+        numpy.ndarray
+            The sorted positions `row * cols + col` of nonzero elements.
+        """
+        row_idx, col_idx, _ = self.to_coo()
+        return row_idx * self.cols + col_idx
+
+    def to_array(self):
+        """
+        Get the dense numpy array.
+
+        Returns
+        -------
+        numpy.ndarray
+            A new 2D array with the elements of the matrix.
+        """
+        row_idx, col_idx, values = self.to_coo()
+        array = np.zeros((self.rows, self.cols), dtype=values.dtype)
+        array[row_idx, col_idx] = values
+        return array
+
+    def to_dense(self):
+        """
+        Convert the matrix to dense matrix of `dense_class`.
+
+        Returns
+        -------
+        Matrix
+            The dense matrix.
+        """
+        return self.dense_class(self.to_array())
+
+    def digest(self):
+        """
+        Returns the memoized digest of the matrix.
+
+        The digest is computed over the arrays of CSR format, so the dense
+        matrix is not created.
+
+        Returns
+        -------
+        bytes
+            The 16 bytes BLAKE2 digest.
+        """
+        digest = getattr(self, "_digest", None)
+        if digest is None:
+            blake2b = hashlib.blake2b(digest_size=16)
+            blake2b.update(f"csr{self.data.dtype.str}{(self.rows, self.cols)}".encode())
+            blake2b.update(self.indptr.tobytes())
+            blake2b.update(self.indices.tobytes())
+            if self.data.dtype.kind == "O":
+                blake2b.update(repr(self.data.tolist()).encode())
+            else:
+                blake2b.update(self.data.tobytes())
+            digest = self._digest = blake2b.digest()
+        return digest
+
+    def invalidate_digest(self):
+        """
+        Forgets the memoized digest of the matrix.
+
+        It must be called after the arrays of CSR format are changed in place.
+        """
+        self._digest = None
+
+    def __setitem__(self, index, value):
+        """
+        Sets the element of the matrix and invalidates the digest.
+
+        The arrays of CSR format are copied, so it takes O(nnz) time.
+
+        Parameters
+        ----------
+        index : tuple of int
+            The row and the column of the element.
+        value : int or float
+            The new value of the element.
+        """
+        i, j = index
+        start, end = self.indptr[i], self.indptr[i + 1]
+        position = start + np.searchsorted(self.indices[start:end], j)
+        data = self.data.astype(np.result_type(self.data, value), copy=False)
+        indices, indptr = self.indices, self.indptr.copy()
+        if position < end and indices[position] == j:
+            if value == 0:
+                data = np.delete(data, position)
+                indices = np.delete(indices, position)
+                indptr[i + 1 :] -= 1
+            else:
+                data[position] = value
+        elif value != 0:
+            data = np.insert(data, position, value)
+            indices = np.insert(indices, position, j)
+            indptr[i + 1 :] += 1
+        self.set_csr(data, indices, indptr, (self.rows, self.cols))
+
+    def check_same_shape(self, other, operation):
+        """
+        Check that the matrices have the same shape for element-wise operation.
+
+        Parameters
+        ----------
+        other : Matrix
+            The other matrix of the operation.
+        operation : str
+            The name of the operation for the error message.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        if self.rows != other.rows or self.cols != other.cols:
+            message = f"The matrices must have the same number of rows and columns for {operation}"
+            raise ValueError(message)
+
+    def add_matrix(self, other, sign):
+        """
+        Add the other matrix multiplied by sign.
+
+        Parameters
+        ----------
+        other : Matrix
+            The other matrix, sparse or dense.
+        sign : int
+            1 for addition and -1 for subtraction.
+
+        Returns
+        -------
+        Matrix
+            The sum of the matrices, sparse or dense by its density.
+        """
+        row_idx, col_idx, data = self.to_coo()
+        if isinstance(other, SparseStorageMixin):
+            other_row_idx, other_col_idx, other_data = other.to_coo()
+            result = self.from_coo(
+                np.concatenate([row_idx, other_row_idx]),
+                np.concatenate([col_idx, other_col_idx]),
+                np.concatenate([data, sign * other_data]),
+                (self.rows, self.cols),
+            )
+        else:
+            result = sign * np.asarray(other.matrix)
+            result = result.astype(np.result_type(result, data), copy=False)
+            result[row_idx, col_idx] += data
+        return self.from_matrix(result)
+
+    def __add__(self, other):
+        """
+        Add two matrices by element-wise way.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to add to the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the addition.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "addition")
+        return self.add_matrix(other, 1)
+
+    def __sub__(self, other):
+        """
+        Perform element-wise subtraction of the current matrix with another matrix.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to subtract from the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the subtraction.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "subtraction")
+        return self.add_matrix(other, -1)
+
+    def __mul__(self, other):
+        """
+        Multiply two matrices element-wise.
+
+        Only the nonzero elements of the current matrix are multiplied.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+
+        Returns
+        -------
+        Matrix
+            The result of the multiplication.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "multiplication")
+        if isinstance(other, SparseStorageMixin):
+            keys, positions, other_positions = np.intersect1d(
+                self.get_keys(), other.get_keys(), True, return_indices=True
+            )
+            row_idx, col_idx = np.divmod(keys, self.cols)
+            values = self.data[positions] * other.data[other_positions]
+        else:
+            row_idx, col_idx, data = self.to_coo()
+            values = data * np.asarray(other.matrix)[row_idx, col_idx]
+        result = self.from_coo(row_idx, col_idx, values, (self.rows, self.cols))
+        return self.from_matrix(result)
+
+    def __truediv__(self, other):
+        """
+        Perform element-wise division of the current matrix with another matrix.
+
+        If all zeros of the other matrix are at the positions of nonzero
+        elements of the current matrix, only nonzero elements are divided.
+        Otherwise `0 / 0` gives `nan`, so the matrices are divided as dense.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to divide the current matrix by.
+
+        Returns
+        -------
+        Matrix
+            The result of the division.
+
+        Raises
+        ------
+        ValueError
+            If the matrices do not have the same number of rows and columns.
+        """
+        self.check_same_shape(other, "division")
+        if isinstance(other, SparseStorageMixin):
+            divisor = other.to_array()
+        else:
+            divisor = np.asarray(other.matrix)
+        row_idx, col_idx, data = self.to_coo()
+        divisor_values = divisor[row_idx, col_idx]
+        zeros_cnt = divisor.size - np.count_nonzero(divisor)
+        if zeros_cnt != np.count_nonzero(divisor_values == 0):
+            return self.from_matrix(self.to_array() / divisor)
+
+        values = data / divisor_values
+        result = self.from_coo(row_idx, col_idx, values, (self.rows, self.cols))
+        return self.from_matrix(result)
+
+    def matmul(self, other, algorithm=None, **options):
+        """
+        Perform matrix multiplication by the given algorithm.
+
+        Parameters
+        ----------
+        other : Matrix
+            The matrix to multiply with the current matrix.
+        algorithm : str or None, optional
+            The name of the algorithm from `matmul_algorithms`:
+            "csr" - `csr_matmul`. None means `matmul_algorithm`.
+        **options
+            The options of the algorithm.
+
+        Returns
+        -------
+        Matrix
+            The result of the matrix multiplication, sparse or dense
+            by its density.
+
+        Raises
+        ------
+        ValueError
+            If the number of columns of the first matrix does not match the number of rows of the second matrix
+            or the algorithm is unknown.
+        """
+        if self.cols != other.rows:
+            message = (
+                "The number of columns of the first matrix must match the number of rows"
+                " of the second matrix for multiplication"
+            )
+            raise ValueError(message)
+
+        algorithm = algorithm or self.matmul_algorithm
+        if algorithm not in self.matmul_algorithms:
+            message = (
+                f"Unknown matrix multiplication algorithm {algorithm!r},"
+                f" available algorithms: {', '.join(self.matmul_algorithms)}"
+            )
+            raise ValueError(message)
+
+        matmul_func = self.matmul_algorithms[algorithm]
+        return matmul_func(self, other, **options)
 
-    This class inherits from the `Matrix` class and mixes in the `StrMixin` and `ToTxtFileMixin` classes
-    to provide additional functionality for string representation and writing the matrix to a text file.
+
+class SparseMatrix(SparseStorageMixin, Matrix):
+    """
+    A class representing a sparse matrix stored in CSR format.
+
+    This class inherits from the `Matrix` class and mixes in the `SparseStorageMixin` class
+    to store only nonzero elements and to perform operations in time proportional to their number.
+    Dense results are `NumpyMatrix`.
 
     Attributes
     ----------
-    matrix : list of list
-        A 2D list representing the matrix in numpy.array.tolist() style.
+    data : numpy.ndarray
+        The values of nonzero elements row by row.
+    indices : numpy.ndarray
+        The columns of nonzero elements.
+    indptr : numpy.ndarray
+        The positions of the first elements of rows in `data`.
     rows : int
         The number of rows in the matrix.
     cols : int
@@ -539,31 +2626,45 @@ class FunctionalMatrix(Matrix, StrMixin, ToTxtFileMixin):
         Multiply two matrices element-wise.
     __matmul__(other)
         Perform matrix multiplication.
-    __str__()
-        Returns a string representation of the matrix.
-    write_to_file(path_to_file)
-        Writes the string representation of the matrix to a file.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
+    __sub__(other)
+        Perform element-wise subtraction of the current matrix with another matrix.
+    __truediv__(other)
+        Perform element-wise division of the current matrix with another matrix.
+
+    Examples
+    --------
+    >>> sparse = SparseMatrix([[0, 0, 1], [2, 0, 0], [0, 0, 0]])
+    >>> sparse.nnz, sparse.indptr.tolist(), sparse.indices.tolist()
+    (2, [0, 1, 2, 2], [2, 0])
+    >>> product = sparse @ sparse
+    >>> product.matrix.tolist()
+    [[0, 0, 0], [0, 0, 2], [0, 0, 0]]
+    >>> type(product).__name__  # density 1/9 exceeds the threshold 0.1
+    'NumpyMatrix'
     """
 
-    pass
+    dense_class = NumpyMatrix
 
 
-class FunctionalArithmeticMatrix(
-    ArithmeticMatrix, StrMixin, ToTxtFileMixin, PropertyMixin
-):
+class FunctionalArithmeticSparseMatrix(FunctionalArithmeticMatrix, SparseMatrix):
     """
-    A class representing a matrix with functionalities for arithmetic operations, string representation, file writing
-    and for getting and setting `matrix` property.
+    A class representing a sparse matrix stored in CSR format with functionalities for arithmetic operations,
+    string representation, file writing and for getting and setting `matrix` property.
 
-    This class inherits from the `ArithmeticMatrix` class and mixes in the `StrMixin`, `ToTxtFileMixin` and
-    `PropertyMixin` classes to provide additional functionality for arithmetic operations
-    (addition, multiplication, subtraction, division), string representation, writing the matrix to a text file and
-    getting and setting `matrix` property.
+    This class inherits from the `FunctionalArithmeticMatrix` and `SparseMatrix` classes, so it has the same
+    functionality as `FunctionalArithmeticMatrix` and its operations are performed on nonzero elements.
+    Dense results are `FunctionalArithmeticNumpyMatrix`.
 
     Attributes
     ----------
-    matrix : list of list
-        A 2D list representing the matrix in numpy.array.tolist() style.
+    data : numpy.ndarray
+        The values of nonzero elements row by row.
+    indices : numpy.ndarray
+        The columns of nonzero elements.
+    indptr : numpy.ndarray
+        The positions of the first elements of rows in `data`.
     rows : int
         The number of rows in the matrix.
     cols : int
@@ -577,6 +2678,8 @@ class FunctionalArithmeticMatrix(
         Multiply two matrices element-wise.
     __matmul__(other)
         Perform matrix multiplication.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm.
     __sub__(other)
         Perform element-wise subtraction of the current matrix with another matrix.
     __truediv__(other)
@@ -587,32 +2690,32 @@ class FunctionalArithmeticMatrix(
         Writes the string representation of the matrix to a file.
     """
 
-    pass
+    dense_class = FunctionalArithmeticNumpyMatrix
 
 
-class ArithmeticHashMatrix(HashMatrix, SubMixin, DivMixin):
+class FunctionalArithmeticHashSparseMatrix(
+    FunctionalArithmeticHashMatrix, SparseMatrix
+):
     """
-    A class representing a matrix with arithmetic operations and a custom hash implementation.
+    A class representing a sparse matrix stored in CSR format with functionalities for arithmetic operations,
+    string representation, file writing, getting and setting `matrix` property and a custom hash implementation.
 
-    This class inherits from both the `HashMatrix` and `SubMixin` and `DivMixin` classes,
-    providing functionality for matrix operations, subtraction, division, and a custom hash
-    implementation. It also includes a caching mechanism for matrix multiplication results
-    based on the hash values of the matrices.
+    This class inherits from the `FunctionalArithmeticHashMatrix` and `SparseMatrix` classes, so it has the same
+    functionality as `FunctionalArithmeticHashMatrix` and its operations are performed on nonzero elements.
+    The digest is computed over the arrays of CSR format. Dense results are `FunctionalArithmeticHashNumpyMatrix`.
 
     Attributes
     ----------
-    matrix : list of list
-        A 2D list representing the matrix in numpy.array.tolist() style.
+    data : numpy.ndarray
+        The values of nonzero elements row by row.
+    indices : numpy.ndarray
+        The columns of nonzero elements.
+    indptr : numpy.ndarray
+        The positions of the first elements of rows in `data`.
     rows : int
         The number of rows in the matrix.
     cols : int
         The number of columns in the matrix.
-    _hash : set
-        A set used to store the hash values of matrices involved in
-        matrix multiplication operations.
-    _hash_prod_result : Matrix or None
-        A cache for the result of the last matrix multiplication
-        operation involving matrices with hash values stored in `_hash`.
 
     Methods
     -------
@@ -621,64 +2724,508 @@ class ArithmeticHashMatrix(HashMatrix, SubMixin, DivMixin):
     __mul__(other)
         Multiply two matrices element-wise.
     __matmul__(other)
-        Perform matrix multiplication with caching based on hash values.
+        Perform matrix multiplication with caching based on digests.
+    matmul(other, algorithm=None, **options)
+        Perform matrix multiplication by the given algorithm without caching.
     __sub__(other)
         Perform element-wise subtraction of the current matrix with another matrix.
     __truediv__(other)
         Perform element-wise division of the current matrix with another matrix.
     clear_cache()
         Clear the cache for matrix multiplication results.
+    __str__()
+        Returns a string representation of the matrix.
+    write_to_file(path_to_file)
+        Writes the string representation of the matrix to a file.
     """
 
-    pass
+    dense_class = FunctionalArithmeticHashNumpyMatrix
 
 
-class FunctionalArithmeticHashMatrix(
-    ArithmeticHashMatrix, StrMixin, ToTxtFileMixin, PropertyMixin
-):
+def true_divide(x, y):
+    """Divides numbers like NumPy does in `DivMixin`.
+
+    Division by zero does not raise `ZeroDivisionError` but gives `inf`,
+    `-inf` or `nan` with NumPy `RuntimeWarning`, so fused kernels give
+    the same results as eager operations.
+
+    Parameters
+    ----------
+    x : int or float
+        The dividend.
+    y : int or float
+        The divisor.
+
+    Returns
+    -------
+    float
+        The quotient.
+
+    Examples
+    --------
+    >>> true_divide(1, 4)
+    0.25
+    >>> with np.errstate(divide="ignore", invalid="ignore"):
+    ...     true_divide(-1, 0), true_divide(0, 0)
+    (-inf, nan)
     """
-    A class representing a matrix with functionalities for arithmetic operations, string representation, file writing,
-    and for getting and setting `matrix` property, along with a custom hash implementation.
+    try:
+        return x / y
+    except ZeroDivisionError:
+        return float(np.true_divide(x, y))
 
-    This class inherits from the `ArithmeticHashMatrix` class and mixes in the `StrMixin`, `ToTxtFileMixin`, and
-    `PropertyMixin` classes to provide additional functionality for arithmetic operations (addition, multiplication,
-    subtraction, division), string representation, writing the matrix to a text file, and getting and setting `matrix`
-    property. It also includes a caching mechanism for matrix multiplication results based on the hash values of
-    the matrices.
+
+@lru_cache(maxsize=256)
+def compile_elementwise_kernel(expression, inputs_cnt):
+    """Compiles fused element-wise kernel for matrices stored in list of list.
+
+    Parameters
+    ----------
+    expression : str
+        The expression computing one element of the result from elements
+        `x0`, `x1`, ... of the inputs, division is `true_divide(x0, x1)`.
+    inputs_cnt : int
+        The number of the input matrices.
+
+    Returns
+    -------
+    callable
+        The function of the input matrices that returns the result as
+        list of list computed in one pass without intermediate matrices.
+    """
+    matrices = ", ".join(f"m{i}" for i in range(inputs_cnt))
+    # trailing commas unpack tuples of one element too
+    rows = "".join(f"r{i}, " for i in range(inputs_cnt))
+    elems = "".join(f"x{i}, " for i in range(inputs_cnt))
+    source = (
+        f"lambda {matrices}: [[{expression} for {elems} in zip({rows})]"
+        f" for {rows} in zip({matrices})]"
+    )
+    return eval(source, {"true_divide": true_divide})
+
+
+class LazyMatrix(StrMixin, ToTxtFileMixin):
+    """
+    A class representing a lazy expression of matrices.
+
+    Operators `+`, `-`, `*`, `/` and `@` do not compute anything, they build
+    a directed acyclic graph of the expression. The expression is evaluated
+    only when its result is accessed by `matrix`, `str()`, `write_to_file()`
+    or `evaluate()`, and the result is memoized.
+
+    The evaluator:
+    - fuses every connected group of element-wise operations into one pass
+      over the elements without intermediate matrices. Matrices stored in
+      list of list are processed by one compiled comprehension, numpy arrays
+      by ufuncs writing to the buffers of temporary results;
+    - eliminates common subexpressions: the same operation on the same
+      matrices is computed once;
+    - reorders chains of matrix multiplications to reduce the number of
+      multiplications of elements.
+
+    Matrix multiplications are performed by the `@` operator of the matrices,
+    so their algorithms and caches are used. The result has the type of
+    the leftmost matrix of its group of operations.
 
     Attributes
     ----------
-    matrix : list of list
-        A 2D list representing the matrix in numpy.array.tolist() style.
     rows : int
-        The number of rows in the matrix.
+        The number of rows of the result.
     cols : int
-        The number of columns in the matrix.
-    _hash : set
-        A set used to store the hash values of matrices involved in
-        matrix multiplication operations.
-    _hash_prod_result : Matrix or None
-        A cache for the result of the last matrix multiplication
-        operation involving matrices with hash values stored in `_hash`.
+        The number of columns of the result.
+    operator : str or None
+        The operator of the node of the expression, None for matrices.
+    operands : tuple of LazyMatrix
+        The operands of the operator.
+    matrix : list of list or numpy.ndarray
+        The evaluated result of the expression.
 
     Methods
     -------
     __add__(other)
-        Add two matrices by element-wise way.
-    __mul__(other)
-        Multiply two matrices element-wise.
-    __matmul__(other)
-        Perform matrix multiplication with caching based on hash values.
+        Add two matrices by element-wise way lazily.
     __sub__(other)
-        Perform element-wise subtraction of the current matrix with another matrix.
+        Subtract two matrices by element-wise way lazily.
+    __mul__(other)
+        Multiply two matrices element-wise lazily.
     __truediv__(other)
-        Perform element-wise division of the current matrix with another matrix.
-    clear_cache()
-        Clear the cache for matrix multiplication results.
+        Divide two matrices element-wise lazily.
+    __matmul__(other)
+        Perform matrix multiplication lazily.
+    evaluate()
+        Evaluate the expression.
     __str__()
-        Returns a string representation of the matrix.
+        Returns a string representation of the result.
     write_to_file(path_to_file)
-        Writes the string representation of the matrix to a file.
+        Writes the string representation of the result to a file.
     """
 
-    pass
+    def __init__(self, matrix=None, operator=None, operands=()):
+        """
+        Initialize a lazy expression.
+
+        Parameters
+        ----------
+        matrix : Matrix or None, optional
+            The matrix for the expression consisting of one matrix.
+        operator : str or None, optional
+            The operator of the expression: "+", "-", "*", "/" or "@".
+        operands : tuple of LazyMatrix, optional
+            The two operands of the operator.
+
+        Raises
+        ------
+        ValueError
+            If the shapes of the operands are not compatible for the operator.
+        """
+        self.operator = operator
+        self.operands = operands
+        self._value = matrix
+
+        if operator is None:
+            self.rows, self.cols = matrix.rows, matrix.cols
+            # одна и та же матрица - одно и то же подвыражение
+            self.key = ("matrix", id(matrix))
+            return
+
+        left, right = operands
+        if operator == "@":
+            if left.cols != right.rows:
+                message = (
+                    "The number of columns of the first matrix must match the number of rows"
+                    " of the second matrix for multiplication"
+                )
+                raise ValueError(message)
+            self.rows, self.cols = left.rows, right.cols
+        else:
+            if left.rows != right.rows or left.cols != right.cols:
+                name = LAZY_ELEMENTWISE_OPERATORS[operator][0]
+                message = f"The matrices must have the same number of rows and columns for {name}"
+                raise ValueError(message)
+            self.rows, self.cols = left.rows, left.cols
+        self.key = (operator, left.key, right.key)
+
+    def apply(self, operator, other):
+        """
+        Build the expression applying the operator to this expression and other.
+
+        Parameters
+        ----------
+        operator : str
+            The operator: "+", "-", "*", "/" or "@".
+        other : LazyMatrix or Matrix
+            The second operand.
+
+        Returns
+        -------
+        LazyMatrix
+            The new expression.
+        """
+        if not isinstance(other, LazyMatrix):
+            other = LazyMatrix(other)
+        return LazyMatrix(operator=operator, operands=(self, other))
+
+    def __add__(self, other):
+        """
+        Add two matrices by element-wise way lazily.
+
+        Parameters
+        ----------
+        other : LazyMatrix or Matrix
+            The matrix to add to the current matrix.
+
+        Returns
+        -------
+        LazyMatrix
+            The expression of the addition.
+        """
+        return self.apply("+", other)
+
+    def __sub__(self, other):
+        """
+        Subtract two matrices by element-wise way lazily.
+
+        Parameters
+        ----------
+        other : LazyMatrix or Matrix
+            The matrix to subtract from the current matrix.
+
+        Returns
+        -------
+        LazyMatrix
+            The expression of the subtraction.
+        """
+        return self.apply("-", other)
+
+    def __mul__(self, other):
+        """
+        Multiply two matrices element-wise lazily.
+
+        Parameters
+        ----------
+        other : LazyMatrix or Matrix
+            The matrix to multiply with the current matrix.
+
+        Returns
+        -------
+        LazyMatrix
+            The expression of the multiplication.
+        """
+        return self.apply("*", other)
+
+    def __truediv__(self, other):
+        """
+        Divide two matrices element-wise lazily.
+
+        Parameters
+        ----------
+        other : LazyMatrix or Matrix
+            The matrix to divide the current matrix by.
+
+        Returns
+        -------
+        LazyMatrix
+            The expression of the division. Division by zero gives `inf`
+            or `nan` like the eager division of `DivMixin`.
+
+        Examples
+        --------
+        >>> E = FunctionalArithmeticMatrix([[1, -2], [0, 4]])
+        >>> Z = FunctionalArithmeticMatrix([[0, 0], [0, 2]])
+        >>> with np.errstate(divide="ignore", invalid="ignore"):
+        ...     eager, lazy = E / Z, (E.lazy() / Z).matrix
+        >>> lazy
+        [[inf, -inf], [nan, 2.0]]
+        >>> np.array_equal(eager.matrix, lazy, equal_nan=True)
+        True
+        """
+        return self.apply("/", other)
+
+    def __matmul__(self, other):
+        """
+        Perform matrix multiplication lazily.
+
+        Parameters
+        ----------
+        other : LazyMatrix or Matrix
+            The matrix to multiply with the current matrix.
+
+        Returns
+        -------
+        LazyMatrix
+            The expression of the matrix multiplication.
+        """
+        return self.apply("@", other)
+
+    @property
+    def matrix(self):
+        """
+        Get the evaluated result of the expression.
+
+        Returns
+        -------
+        list of list or numpy.ndarray
+            The result of the expression.
+        """
+        return self.evaluate().matrix
+
+    def evaluate(self):
+        """
+        Evaluate the expression, the result is memoized.
+
+        Returns
+        -------
+        Matrix
+            The result of the expression.
+        """
+        if self._value is None:
+            self._value = self.evaluate_node({})
+        return self._value
+
+    def evaluate_node(self, memo):
+        """
+        Evaluate the node of the expression.
+
+        Parameters
+        ----------
+        memo : dict
+            The results of evaluated subexpressions by their keys.
+
+        Returns
+        -------
+        Matrix
+            The result of the node.
+        """
+        if self._value is not None:
+            return self._value
+        if self.key not in memo:
+            if self.operator == "@":
+                memo[self.key] = self.evaluate_matmul_chain(memo)
+            else:
+                memo[self.key] = self.evaluate_elementwise(memo)
+        return memo[self.key]
+
+    def get_matmul_chain(self):
+        """
+        Get the operands of the chain of matrix multiplications.
+
+        Returns
+        -------
+        list of LazyMatrix
+            The operands of consecutive `@` operators from left to right.
+        """
+        if self.operator != "@" or self._value is not None:
+            return [self]
+        left, right = self.operands
+        return left.get_matmul_chain() + right.get_matmul_chain()
+
+    def evaluate_matmul_chain(self, memo):
+        """
+        Evaluate the chain of matrix multiplications in the optimal order.
+
+        Parameters
+        ----------
+        memo : dict
+            The results of evaluated subexpressions by their keys.
+
+        Returns
+        -------
+        Matrix
+            The product of the chain computed by `Matrix.chain_matmul`.
+        """
+        matrices = [node.evaluate_node(memo) for node in self.get_matmul_chain()]
+        return Matrix.chain_matmul(*matrices)
+
+    def collect_elementwise(self, inputs, counts):
+        """
+        Collect the group of element-wise operations starting from the node.
+
+        Parameters
+        ----------
+        inputs : dict
+            The nodes that are not element-wise operations (matrices and
+            matrix multiplications) by their keys, it is filled.
+        counts : collections.Counter
+            The numbers of uses of element-wise nodes by their keys, it is filled.
+        """
+        if self.operator in LAZY_ELEMENTWISE_OPERATORS and self._value is None:
+            counts[self.key] += 1
+            if counts[self.key] == 1:
+                for operand in self.operands:
+                    operand.collect_elementwise(inputs, counts)
+        else:
+            inputs.setdefault(self.key, self)
+
+    def evaluate_elementwise(self, memo):
+        """
+        Evaluate the group of element-wise operations in one pass.
+
+        Parameters
+        ----------
+        memo : dict
+            The results of evaluated subexpressions by their keys.
+
+        Returns
+        -------
+        Matrix
+            The result of the group of operations.
+        """
+        inputs, counts = {}, Counter()
+        self.collect_elementwise(inputs, counts)
+        values = {key: node.evaluate_node(memo) for key, node in inputs.items()}
+        result_type = type(next(iter(values.values())))
+
+        if all(isinstance(value.matrix, np.ndarray) for value in values.values()):
+            data = {key: value.matrix for key, value in values.items()}
+            result, _ = self.evaluate_numpy(data, counts, {})
+            return result_type(result)
+
+        names = {key: f"x{i}" for i, key in enumerate(inputs)}
+        expression = self.get_elementwise_expression(names, counts, {})
+        kernel = compile_elementwise_kernel(expression, len(inputs))
+        return result_type(kernel(*(values[key].matrix for key in inputs)))
+
+    def get_elementwise_expression(self, names, counts, temps):
+        """
+        Get the Python expression computing one element of the node.
+
+        Subexpressions used several times are assigned to temporary
+        variables by `:=` at the first use and reused later.
+
+        Parameters
+        ----------
+        names : dict
+            The names of the elements of the inputs by their keys.
+        counts : collections.Counter
+            The numbers of uses of element-wise nodes by their keys.
+        temps : dict
+            The names of temporary variables by keys of the nodes,
+            it is filled.
+
+        Returns
+        -------
+        str
+            The expression.
+        """
+        if self.key in names:
+            return names[self.key]
+        if self.key in temps:
+            return temps[self.key]
+
+        left, right = (
+            operand.get_elementwise_expression(names, counts, temps)
+            for operand in self.operands
+        )
+        if self.operator == "/":
+            # деление на ноль как в NumPy, а не ZeroDivisionError
+            expression = f"true_divide({left}, {right})"
+        else:
+            expression = f"({left} {self.operator} {right})"
+        if counts[self.key] > 1:
+            temps[self.key] = f"t{len(temps)}"
+            expression = f"({temps[self.key]} := {expression})"
+        return expression
+
+    def evaluate_numpy(self, data, counts, temps):
+        """
+        Evaluate the node by numpy ufuncs reusing buffers of temporary results.
+
+        Parameters
+        ----------
+        data : dict
+            The arrays of the inputs by their keys.
+        counts : collections.Counter
+            The numbers of uses of element-wise nodes by their keys.
+        temps : dict
+            The arrays of subexpressions used several times by their keys,
+            it is filled.
+
+        Returns
+        -------
+        array : numpy.ndarray
+            The result of the node.
+        is_temporary : bool
+            Whether the array is a temporary result that can be overwritten.
+        """
+        if self.key in data:
+            return data[self.key], False
+        if self.key in temps:
+            return temps[self.key], False
+
+        (left, is_left_temporary), (right, is_right_temporary) = (
+            operand.evaluate_numpy(data, counts, temps) for operand in self.operands
+        )
+        ufunc = LAZY_ELEMENTWISE_OPERATORS[self.operator][1]
+        dtype = ufunc.resolve_dtypes((left.dtype, right.dtype, None))[-1]
+
+        out = None
+        if is_left_temporary and left.dtype == dtype:
+            out = left
+        elif is_right_temporary and right.dtype == dtype:
+            out = right
+        result = ufunc(left, right, out=out)
+
+        if counts[self.key] > 1:
+            temps[self.key] = result
+            return result, False
+        return result, True